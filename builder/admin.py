@@ -2,7 +2,8 @@
 from django.contrib import admin
 from .models import (
     UserProfile, Education, Experience, Skill, 
-    Project, Certification, ResumeTemplate, Resume, ResumeAnalytics
+    Project, Certification, ResumeTemplate, Resume, ResumeAnalytics,
+    ResumeAnalyticsDaily, ResumeTrafficSources, PDFRenderJob, PDFRenderMetric
 )
 
 @admin.register(UserProfile)
@@ -57,3 +58,26 @@ class ResumeAnalyticsAdmin(admin.ModelAdmin):
     list_display = ('resume', 'action', 'created_at')
     list_filter = ('action', 'created_at')
     search_fields = ('resume__title', 'action')
+
+@admin.register(ResumeAnalyticsDaily)
+class ResumeAnalyticsDailyAdmin(admin.ModelAdmin):
+    list_display = ('resume', 'action', 'date', 'count')
+    list_filter = ('action', 'date')
+    search_fields = ('resume__title',)
+
+@admin.register(ResumeTrafficSources)
+class ResumeTrafficSourcesAdmin(admin.ModelAdmin):
+    list_display = ('resume', 'kind', 'updated_at')
+    list_filter = ('kind',)
+    search_fields = ('resume__title',)
+
+@admin.register(PDFRenderJob)
+class PDFRenderJobAdmin(admin.ModelAdmin):
+    list_display = ('resume', 'status', 'font', 'color', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('resume__title', 'error')
+
+@admin.register(PDFRenderMetric)
+class PDFRenderMetricAdmin(admin.ModelAdmin):
+    list_display = ('source', 'template', 'font', 'color', 'total_ms', 'pages', 'size_bytes', 'created_at')
+    list_filter = ('source', 'template', 'created_at')
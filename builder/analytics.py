@@ -0,0 +1,918 @@
+"""
+Buffered ingestion of resume analytics events
+
+Requests no longer write a ResumeAnalytics row each. record_event() appends
+the event to an in-process buffer and to a journal file, and a background
+thread writes the buffer with a single bulk_create once it holds
+ANALYTICS_BUFFER_SIZE events or ANALYTICS_FLUSH_INTERVAL seconds have
+passed. The journal is synced to disk at least every
+ANALYTICS_FSYNC_INTERVAL seconds, so a crash loses at most that window;
+journals left behind by dead processes are replayed when the next process
+starts recording. Events carry their primary key from the start, so a replay
+after a partially completed flush never creates duplicates.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import datetime
+from urllib.parse import urlsplit
+import os
+import json
+import gzip
+import hashlib
+import ipaddress
+import glob
+import time
+import uuid
+import atexit
+import threading
+from collections import Counter
+import logging
+
+from .bot_detection import is_bot
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PREFIX = 'analytics-'
+DEAD_LETTER_PREFIX = 'dead-letter-'
+
+
+def get_journal_dir():
+    """Return the directory holding the analytics journals"""
+    return str(getattr(settings, 'ANALYTICS_JOURNAL_DIR', os.path.join(settings.BASE_DIR, 'var', 'analytics')))
+
+
+def _pid_alive(pid):
+    """Check whether a process is still running (always True where that cannot be told)"""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+# Longer user agents and referrers are cut off before they are interned
+MAX_LOOKUP_LENGTH = 1024
+
+
+def pack_ip(ip):
+    """Pack an IP address to 4 (IPv4) or 16 (IPv6) bytes, or None if it is not valid"""
+    try:
+        return ipaddress.ip_address((ip or '').strip()).packed
+    except ValueError:
+        return None
+
+
+def unpack_ip(packed):
+    """Turn a packed IP address back into text ('' if unknown)"""
+    return str(ipaddress.ip_address(bytes(packed))) if packed else ''
+
+
+def get_referrer_domain(url):
+    """Return the host name of a referrer URL without a leading 'www.'"""
+    try:
+        host = (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def _lookup_hash(value):
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def intern_values(model, field, values, **extra_fields):
+    """
+    Map strings to their rows in a lookup table, creating missing rows
+    
+    Args:
+        model: Lookup model with a text `field` and a unique `<field>_hash`
+        field: Name of the text field ('value' or 'url')
+        values: Strings to look up; empty ones are ignored
+        extra_fields: Callables computing further fields from the string
+    
+    Returns:
+        dict: String to model instance
+    """
+    hash_field = f"{field}_hash"
+    hashes = {value: _lookup_hash(value) for value in values if value}
+    if not hashes:
+        return {}
+    
+    def load(wanted):
+        return {getattr(obj, hash_field): obj for obj in model.objects.filter(**{f"{hash_field}__in": wanted})}
+    
+    found = load(list(hashes.values()))
+    missing = {value: value_hash for value, value_hash in hashes.items() if value_hash not in found}
+    if missing:
+        model.objects.bulk_create(
+            [
+                model(**{field: value, hash_field: value_hash}, **{name: compute(value) for name, compute in extra_fields.items()})
+                for value, value_hash in missing.items()
+            ],
+            ignore_conflicts=True,
+        )
+        # Load the new rows (or those another process inserted first)
+        found.update(load(list(missing.values())))
+    
+    return {value: found[value_hash] for value, value_hash in hashes.items()}
+
+
+def _drop_orphaned_events(resume_model, events):
+    """Remove events whose resume no longer exists (or whose resume id is malformed)"""
+    resume_ids = {}
+    for event in events:
+        try:
+            resume_ids[event['resume_id']] = uuid.UUID(str(event['resume_id']))
+        except ValueError:
+            pass
+    
+    existing = set(resume_model.objects.filter(pk__in=set(resume_ids.values())).values_list('pk', flat=True))
+    kept = [event for event in events if resume_ids.get(event['resume_id']) in existing]
+    
+    if len(kept) < len(events):
+        logger.warning(f"Dropped {len(events) - len(kept)} analytics event(s) of deleted resumes")
+    
+    return kept
+
+
+def write_events(events):
+    """
+    Store a batch of events
+    
+    The IP, user agent and referrer are moved out of the metadata into the
+    compact columns, interning user agents and referrers.
+    
+    Args:
+        events: List of event dicts as produced by record_event()
+    
+    Returns:
+        int: Number of events stored (events stored before are skipped)
+    """
+    from .models import Resume, ResumeAnalytics, UserAgent, Referrer
+    
+    # Events of resumes deleted since they were recorded would fail the whole batch
+    events = _drop_orphaned_events(Resume, events)
+    if not events:
+        return 0
+    
+    prepared = []
+    for event in events:
+        metadata = dict(event['metadata'] or {})
+        ip = metadata.pop('ip', None)
+        user_agent = (metadata.pop('user_agent', None) or '')[:MAX_LOOKUP_LENGTH]
+        referrer = (metadata.pop('referrer', None) or '')[:MAX_LOOKUP_LENGTH]
+        prepared.append((event, metadata, ip, user_agent, referrer))
+    
+    user_agents = intern_values(UserAgent, 'value', {item[3] for item in prepared})
+    referrers = intern_values(Referrer, 'url', {item[4] for item in prepared}, domain=get_referrer_domain)
+    
+    rows = [
+        ResumeAnalytics(
+            id=uuid.UUID(event['id']),
+            resume_id=event['resume_id'],
+            action=event['action'],
+            metadata=metadata,
+            created_at=parse_datetime(event['created_at']),
+            ip=pack_ip(ip),
+            user_agent=user_agents.get(user_agent),
+            referrer=referrers.get(referrer),
+        )
+        for event, metadata, ip, user_agent, referrer in prepared
+    ]
+    
+    # The same event can appear twice in one batch, e.g. from a journal
+    # replayed after a partial flush
+    unique = {}
+    for row in rows:
+        unique.setdefault(row.id, row)
+    rows = list(unique.values())
+    
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                # Replayed journals may contain events that were already written;
+                # skipping them keeps the rollups from counting an event twice
+                existing = set(
+                    ResumeAnalytics.objects.filter(id__in=[row.id for row in rows]).values_list('id', flat=True)
+                )
+                new_rows = [row for row in rows if row.id not in existing]
+                
+                # No ignore_conflicts: a row skipped silently would still be
+                # counted below, so an event inserted concurrently (another
+                # process replaying the same journal) aborts the whole write
+                ResumeAnalytics.objects.bulk_create(new_rows, batch_size=500)
+                update_daily_rollups(new_rows)
+                update_resume_counters(new_rows)
+                update_traffic_sources(new_rows)
+            return len(new_rows)
+        except IntegrityError:
+            # The retry sees the concurrently committed events and skips them
+            if attempt:
+                raise
+
+
+def write_dead_letters(events, journal_dir=None):
+    """
+    Set events that cannot be stored aside in a dead-letter file
+    
+    Dead-letter files use the journal format, under a prefix that journal
+    replay ignores, so they can be inspected and re-imported by hand.
+    
+    Args:
+        events: List of event dicts
+        journal_dir: Directory to write to (default: ANALYTICS_JOURNAL_DIR)
+    
+    Returns:
+        str: Path of the dead-letter file
+    """
+    journal_dir = journal_dir or get_journal_dir()
+    os.makedirs(journal_dir, exist_ok=True)
+    path = os.path.join(journal_dir, f"{DEAD_LETTER_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl")
+    
+    with open(path, 'w', encoding='utf-8') as dead_letters:
+        for event in events:
+            dead_letters.write(json.dumps(event) + '\n')
+        dead_letters.flush()
+        os.fsync(dead_letters.fileno())
+    
+    logger.error(f"Set {len(events)} analytics event(s) that could not be stored aside in {path}")
+    return path
+
+
+def write_events_or_dead_letter(events, journal_dir=None):
+    """
+    Store a batch of events, isolating the ones that keep failing
+    
+    The batch is written as a whole first. If that fails, events are written
+    one by one and those that still fail go to a dead-letter file, so one
+    bad event never holds back the rest.
+    
+    Args:
+        events: List of event dicts as produced by record_event()
+        journal_dir: Directory for the dead-letter file (default: ANALYTICS_JOURNAL_DIR)
+    
+    Returns:
+        int: Number of events stored
+    """
+    try:
+        return write_events(events)
+    except Exception as e:
+        logger.error(f"Could not store {len(events)} analytics event(s) as a batch, retrying one by one: {str(e)}")
+    
+    stored = 0
+    failed = []
+    for event in events:
+        try:
+            stored += write_events([event])
+        except Exception:
+            failed.append(event)
+    
+    if failed:
+        write_dead_letters(failed, journal_dir)
+    
+    return stored
+
+
+def get_visitor_key(ip, user_agent):
+    """
+    Identify the visitor behind an event for unique-visitor counting
+    
+    Args:
+        ip: IP address of the request ('' or None if unknown)
+        user_agent: User-Agent header of the request ('' or None if unknown)
+    
+    Returns:
+        str: Visitor key, or '' when the event carries no visitor details
+    """
+    ip = ip or ''
+    user_agent = user_agent or ''
+    return f"{ip}|{user_agent}" if ip or user_agent else ''
+
+
+def _visitor_sketch(rows):
+    from .sketches import HyperLogLog
+    
+    sketch = HyperLogLog()
+    for row in rows:
+        key = get_visitor_key(row.ip_address, row.user_agent.value if row.user_agent else '')
+        if key:
+            sketch.add(key)
+    return sketch
+
+
+def update_daily_rollups(rows):
+    """
+    Add newly stored events to the daily rollups
+    
+    Counts are incremented with F(); the visitor sketches of 'viewed'
+    rollups are merged under a row lock.
+    
+    Args:
+        rows: ResumeAnalytics instances that were just inserted
+    """
+    from .models import ResumeAnalyticsDaily
+    from .sketches import HyperLogLog
+    
+    groups = {}
+    for row in rows:
+        key = (row.resume_id, row.action, timezone.localdate(row.created_at))
+        groups.setdefault(key, []).append(row)
+    
+    for (resume_id, action, date), group in groups.items():
+        sketch = _visitor_sketch(group) if action == 'viewed' else None
+        rollups = ResumeAnalyticsDaily.objects.select_for_update().filter(resume_id=resume_id, action=action, date=date)
+        
+        rollup = rollups.first()
+        if rollup is None:
+            try:
+                with transaction.atomic():
+                    ResumeAnalyticsDaily.objects.create(
+                        resume_id=resume_id,
+                        action=action,
+                        date=date,
+                        count=len(group),
+                        visitors=sketch.to_bytes() if sketch else None,
+                    )
+                continue
+            except IntegrityError:
+                # Another process created the row first
+                rollup = rollups.get()
+        
+        rollup.count = F('count') + len(group)
+        update_fields = ['count']
+        if sketch:
+            rollup.visitors = HyperLogLog.from_bytes(rollup.visitors).merge(sketch).to_bytes()
+            update_fields.append('visitors')
+        rollup.save(update_fields=update_fields)
+
+
+def update_resume_counters(rows):
+    """
+    Add newly stored views and downloads to the counters on Resume
+    
+    Args:
+        rows: ResumeAnalytics instances that were just inserted
+    """
+    from .models import Resume
+    
+    views = Counter(row.resume_id for row in rows if row.action == 'viewed')
+    downloads = Counter(row.resume_id for row in rows if row.action == 'pdf_generated')
+    
+    for resume_id in views.keys() | downloads.keys():
+        Resume.objects.filter(pk=resume_id).update(
+            view_count=F('view_count') + views[resume_id],
+            download_count=F('download_count') + downloads[resume_id],
+        )
+
+
+def normalize_utm_source(value):
+    """Return a utm_source value without surrounding whitespace, or None if it is blank"""
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def get_traffic_sources(referrer_domain, metadata):
+    """
+    Name the sources a view is attributed to
+    
+    Args:
+        referrer_domain: Domain of the referrer ('' or None for direct visits)
+        metadata: Event metadata, possibly with the page's 'utm_source'
+    
+    Returns:
+        list: (kind, source) pairs as used by ResumeTrafficSources
+    """
+    sources = [('referrer_domain', referrer_domain or 'direct')]
+    
+    # Older rows may still carry an empty value
+    utm_source = normalize_utm_source(metadata.get('utm_source')) if isinstance(metadata, dict) else None
+    if utm_source:
+        sources.append(('utm_source', utm_source.lower()[:100]))
+    
+    return sources
+
+
+def _save_traffic_sources(resume_id, kind, counts, replace=False):
+    from .models import ResumeTrafficSources
+    from .sketches import SpaceSaving
+    
+    capacity = getattr(settings, 'ANALYTICS_TOP_SOURCES_CAPACITY', 50)
+    record, created = ResumeTrafficSources.objects.select_for_update().get_or_create(resume_id=resume_id, kind=kind)
+    
+    sketch = SpaceSaving(capacity) if replace or created else SpaceSaving.from_dict(record.sketch, capacity)
+    for source, count in counts.most_common():
+        sketch.add(source, count)
+    
+    record.sketch = sketch.to_dict()
+    record.save(update_fields=['sketch', 'updated_at'])
+
+
+def update_traffic_sources(rows):
+    """
+    Add newly stored views to the top referrer and campaign source sketches
+    
+    Args:
+        rows: ResumeAnalytics instances that were just inserted
+    """
+    counts = {}
+    for row in rows:
+        if row.action != 'viewed':
+            continue
+        domain = row.referrer.domain if row.referrer else ''
+        for kind, source in get_traffic_sources(domain, row.metadata):
+            counts.setdefault((row.resume_id, kind), Counter())[source] += 1
+    
+    for (resume_id, kind), sources in counts.items():
+        _save_traffic_sources(resume_id, kind, sources)
+
+
+def rebuild_traffic_sources(events=None):
+    """
+    Recompute the traffic source sketches from the raw views
+    
+    The sketches of every resume with views in `events` are replaced, so
+    pass the full history (archived views are no longer counted).
+    
+    Args:
+        events: ResumeAnalytics queryset to rebuild from (default: all events)
+    
+    Returns:
+        int: Number of sketches written
+    """
+    from .models import ResumeAnalytics
+    
+    if events is None:
+        events = ResumeAnalytics.objects.all()
+    
+    counts = {}
+    views = events.filter(action='viewed').order_by().values_list('resume_id', 'referrer__domain', 'metadata')
+    for resume_id, domain, metadata in views.iterator(chunk_size=2000):
+        for kind, source in get_traffic_sources(domain, metadata):
+            counts.setdefault((resume_id, kind), Counter())[source] += 1
+    
+    with transaction.atomic():
+        for (resume_id, kind), sources in counts.items():
+            _save_traffic_sources(resume_id, kind, sources, replace=True)
+    
+    return len(counts)
+
+
+def rebuild_daily_rollups(events=None):
+    """
+    Recompute the daily rollups from the raw events
+    
+    Args:
+        events: ResumeAnalytics queryset to rebuild from (default: all events);
+            the rollups of every resume, action and day it covers are replaced
+    
+    Returns:
+        int: Number of rollup rows written
+    """
+    from .models import ResumeAnalytics, ResumeAnalyticsDaily
+    from .sketches import HyperLogLog
+    
+    if events is None:
+        events = ResumeAnalytics.objects.all()
+    
+    totals = (
+        events.order_by()
+        .annotate(date=TruncDate('created_at'))
+        .values('resume_id', 'action', 'date')
+        .annotate(count=Count('id'))
+    )
+    rollups = [ResumeAnalyticsDaily(**total) for total in totals.iterator()]
+    
+    # Rebuild the visitor sketches from the views in the same scope
+    sketches = {}
+    views = events.filter(action='viewed').order_by().values_list('resume_id', 'created_at', 'ip', 'user_agent__value')
+    for resume_id, created_at, ip, user_agent in views.iterator(chunk_size=2000):
+        key = get_visitor_key(unpack_ip(ip), user_agent)
+        if key:
+            sketches.setdefault((resume_id, timezone.localdate(created_at)), HyperLogLog()).add(key)
+    
+    for rollup in rollups:
+        if rollup.action == 'viewed' and (rollup.resume_id, rollup.date) in sketches:
+            rollup.visitors = sketches[(rollup.resume_id, rollup.date)].to_bytes()
+    
+    # Days without raw events (e.g. archived ones) keep their rollups
+    ResumeAnalyticsDaily.objects.bulk_create(
+        rollups,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['resume', 'action', 'date'],
+        update_fields=['count', 'visitors'],
+    )
+    
+    return len(rollups)
+
+
+class AnalyticsBuffer:
+    """
+    In-process buffer of analytics events backed by journal segments
+    
+    Each segment is a JSON-lines file holding events that are buffered but
+    not yet stored. A flush closes the current segment, writes its events,
+    and only then deletes it. A batch that fails `max_retries` flushes in a
+    row is written event by event, with the events that still fail set
+    aside in a dead-letter file, so ingestion always moves on.
+    """
+    
+    def __init__(self, max_events=100, flush_interval=5.0, fsync_interval=1.0, journal_dir=None, max_retries=5):
+        self.max_events = max_events
+        self.max_retries = max_retries
+        self.failures = 0
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.journal_dir = journal_dir or get_journal_dir()
+        self.token = uuid.uuid4().hex[:8]
+        self.events = []
+        self.segments = []
+        self.segment_seq = 0
+        self.journal = None
+        self.synced_at = 0
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.flusher = None
+    
+    def _open_segment(self):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.segment_seq += 1
+        path = os.path.join(self.journal_dir, f"{JOURNAL_PREFIX}{os.getpid()}-{self.token}-{self.segment_seq}.jsonl")
+        self.journal = open(path, 'a', encoding='utf-8')
+        self.segments.append(path)
+    
+    def add(self, event):
+        """Buffer one event, journaling it first"""
+        with self.lock:
+            try:
+                if self.journal is None:
+                    self._open_segment()
+                self.journal.write(json.dumps(event) + '\n')
+                self.journal.flush()
+                if time.monotonic() - self.synced_at >= self.fsync_interval:
+                    os.fsync(self.journal.fileno())
+                    self.synced_at = time.monotonic()
+            except OSError as e:
+                # Keep counting even if the journal is unavailable; only durability is lost
+                logger.error(f"Could not journal analytics event: {str(e)}")
+            
+            self.events.append(event)
+            full = len(self.events) >= self.max_events
+        
+        self._ensure_flusher()
+        if full:
+            self.wakeup.set()
+    
+    def _ensure_flusher(self):
+        if self.flusher is not None and self.flusher.is_alive():
+            return
+        with self.lock:
+            if self.flusher is None or not self.flusher.is_alive():
+                self.flusher = threading.Thread(target=self._run, name='analytics-flusher', daemon=True)
+                self.flusher.start()
+    
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Analytics flush failed, will retry: {str(e)}")
+            finally:
+                # The flusher is a long-lived thread outside the request cycle
+                connection.close()
+    
+    def flush(self):
+        """
+        Store every buffered event
+        
+        Returns:
+            int: Number of events stored
+        """
+        with self.flush_lock:
+            with self.lock:
+                events, self.events = self.events, []
+                segments, self.segments = self.segments, []
+                if self.journal is not None:
+                    self.journal.close()
+                    self.journal = None
+            
+            if not events:
+                self._remove(segments)
+                return 0
+            
+            if self.failures < self.max_retries:
+                try:
+                    stored = write_events(events)
+                except Exception:
+                    # Put the batch back in front of newer events; its segments stay on disk
+                    self.failures += 1
+                    with self.lock:
+                        self.events[:0] = events
+                        self.segments[:0] = segments
+                    raise
+            else:
+                # The batch keeps failing: store what can be stored and set the rest aside
+                stored = write_events_or_dead_letter(events, self.journal_dir)
+            
+            self.failures = 0
+            self._remove(segments)
+            return stored
+    
+    def _remove(self, segments):
+        for path in segments:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def replay_orphaned_journals(journal_dir=None, include_live=False):
+    """
+    Store events from journals whose process has died
+    
+    Args:
+        journal_dir: Directory to scan (default: ANALYTICS_JOURNAL_DIR)
+        include_live: Also replay journals of running processes; only safe
+            while no other process is recording events
+    
+    Returns:
+        int: Number of events replayed
+    """
+    replayed = 0
+    own = _buffer.token if _buffer is not None else None
+    
+    for path in sorted(glob.glob(os.path.join(journal_dir or get_journal_dir(), f"{JOURNAL_PREFIX}*.jsonl"))):
+        try:
+            pid, token = os.path.basename(path)[len(JOURNAL_PREFIX):].split('-')[:2]
+            pid = int(pid)
+        except ValueError:
+            continue
+        
+        if token == own or (not include_live and _pid_alive(pid)):
+            continue
+        
+        # Claim the journal by moving it under this process's pid, so two
+        # processes never replay it both; should this one die midway, the
+        # claimed file is an orphaned journal again
+        claimed = os.path.join(os.path.dirname(path), f"{JOURNAL_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}-replay.jsonl")
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            # Claimed by another process in the meantime
+            continue
+        
+        events = []
+        with open(claimed, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from the crash
+                    continue
+        
+        # Events that cannot be stored are set aside so the journal never blocks later replays
+        if events:
+            replayed += write_events_or_dead_letter(events, os.path.dirname(path))
+        try:
+            os.remove(claimed)
+        except FileNotFoundError:
+            pass
+    
+    if replayed:
+        logger.info(f"Replayed {replayed} analytics event(s) from orphaned journals")
+    
+    return replayed
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Return the analytics buffer of this process, replaying orphaned journals on first use"""
+    global _buffer
+    
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = AnalyticsBuffer(
+                max_events=getattr(settings, 'ANALYTICS_BUFFER_SIZE', 100),
+                flush_interval=getattr(settings, 'ANALYTICS_FLUSH_INTERVAL', 5),
+                fsync_interval=getattr(settings, 'ANALYTICS_FSYNC_INTERVAL', 1),
+                max_retries=getattr(settings, 'ANALYTICS_FLUSH_MAX_RETRIES', 5),
+            )
+            atexit.register(flush_events)
+            threading.Thread(target=_replay_in_background, daemon=True).start()
+        return _buffer
+
+
+def _replay_in_background():
+    try:
+        replay_orphaned_journals()
+    except Exception as e:
+        logger.error(f"Could not replay analytics journals: {str(e)}")
+    finally:
+        connection.close()
+
+
+def is_duplicate_view(resume, metadata):
+    """
+    Check whether the same visitor already viewed a resume in this window
+    
+    The public page and its view beacon both report a view, and refreshes
+    report more; one write per resume, visitor and time bucket of
+    ANALYTICS_VIEW_DEDUPE_WINDOW seconds is kept. The markers live in the
+    ANALYTICS_DEDUPE_CACHE_ALIAS cache, which bounds and expires them; a
+    cache shared by all processes is needed to dedupe across processes.
+    
+    Args:
+        resume: Resume model instance (or its primary key)
+        metadata: Event metadata with the 'ip' and 'user_agent' of the request
+    
+    Returns:
+        bool: True if the view should not be recorded again
+    """
+    window = getattr(settings, 'ANALYTICS_VIEW_DEDUPE_WINDOW', 30 * 60)
+    visitor = get_visitor_key(metadata.get('ip'), metadata.get('user_agent'))
+    if not window or not visitor:
+        return False
+    
+    fingerprint = hashlib.sha1(visitor.encode('utf-8')).hexdigest()[:16]
+    bucket = int(time.time() // window)
+    key = f"analytics-view:{getattr(resume, 'pk', resume)}:{fingerprint}:{bucket}"
+    
+    try:
+        cache = caches[getattr(settings, 'ANALYTICS_DEDUPE_CACHE_ALIAS', 'default')]
+        # add() only succeeds for the first view in the bucket
+        return not cache.add(key, 1, window)
+    except Exception as e:
+        logger.error(f"View dedupe cache unavailable: {str(e)}")
+        return False
+
+
+def record_event(resume, action, metadata=None):
+    """
+    Record an analytics event for a resume
+    
+    Args:
+        resume: Resume model instance (or its primary key)
+        action: One of ResumeAnalytics.ACTION_CHOICES
+        metadata: JSON-serializable dict of extra details
+    """
+    metadata = metadata or {}
+    
+    # A blank ?utm_source= means no campaign, not a campaign named ''
+    if 'utm_source' in metadata:
+        metadata = dict(metadata)
+        utm_source = normalize_utm_source(metadata.pop('utm_source'))
+        if utm_source:
+            metadata['utm_source'] = utm_source
+    
+    # Views carrying a user agent are screened for bots and crawlers
+    if action == 'viewed' and 'user_agent' in metadata and is_bot(metadata['user_agent']):
+        policy = getattr(settings, 'ANALYTICS_BOT_POLICY', 'drop')
+        if policy == 'drop':
+            return
+        if policy == 'separate':
+            action = 'bot_viewed'
+    
+    if action == 'viewed' and is_duplicate_view(resume, metadata):
+        return
+    
+    event = {
+        'id': str(uuid.uuid4()),
+        'resume_id': str(getattr(resume, 'pk', resume)),
+        'action': action,
+        'metadata': metadata,
+        'created_at': timezone.now().isoformat(),
+    }
+    
+    if not getattr(settings, 'ANALYTICS_BUFFERED', True):
+        write_events([event])
+        return
+    
+    get_buffer().add(event)
+
+
+def flush_events():
+    """
+    Store buffered events now, e.g. at shutdown or from a management command
+    
+    Returns:
+        int: Number of events stored
+    """
+    if _buffer is None:
+        return 0
+    
+    try:
+        return _buffer.flush()
+    except Exception as e:
+        logger.error(f"Analytics flush failed, events remain journaled: {str(e)}")
+        return 0
+
+
+def get_archive_dir():
+    """Return the directory holding the monthly analytics archives"""
+    return str(getattr(settings, 'ANALYTICS_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'var', 'analytics-archive')))
+
+
+def get_archive_cutoff(days=None):
+    """
+    Return the start of the first day that is kept in the events table
+    
+    Args:
+        days: Number of days to keep (default: ANALYTICS_RETENTION_DAYS)
+    
+    Returns:
+        datetime: Aware datetime at midnight; whole days are archived so
+            the daily rollups of archived days stay complete
+    """
+    if days is None:
+        days = getattr(settings, 'ANALYTICS_RETENTION_DAYS', 365)
+    
+    first_kept = timezone.localdate() - timezone.timedelta(days=days)
+    return timezone.make_aware(datetime.combine(first_kept, datetime.min.time()))
+
+
+def _archived_metadata(event):
+    """Merge the compact request columns back into the metadata, as record_event() received it"""
+    metadata = dict(event['metadata'] if isinstance(event['metadata'], dict) else {})
+    details = {
+        'ip': unpack_ip(event['ip']),
+        'user_agent': event['user_agent__value'],
+        'referrer': event['referrer__url'],
+    }
+    metadata.update({name: value for name, value in details.items() if value})
+    return metadata
+
+
+def archive_events(before, archive_dir=None, chunk_size=5000):
+    """
+    Move events older than a cutoff into gzip-compressed monthly archives
+    
+    Events are read oldest first in chunks, appended to
+    analytics-YYYY-MM.jsonl.gz (one gzip member per chunk), synced, and
+    only then deleted. An interrupted run can therefore leave a chunk in
+    both places; archive lines carry the event id, so a restore with
+    bulk_create(ignore_conflicts=True) stays exact.
+    
+    Args:
+        before: Aware datetime; events created before it are archived
+        archive_dir: Directory for the archives (default: ANALYTICS_ARCHIVE_DIR)
+        chunk_size: Number of events moved per transaction
+    
+    Returns:
+        dict: Number of events archived per month ('YYYY-MM')
+    """
+    from .models import ResumeAnalytics
+    
+    archive_dir = archive_dir or get_archive_dir()
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = Counter()
+    
+    while True:
+        chunk = list(
+            ResumeAnalytics.objects.filter(created_at__lt=before)
+            .order_by('created_at', 'id')
+            .values('id', 'resume_id', 'action', 'metadata', 'created_at', 'ip', 'user_agent__value', 'referrer__url')[:chunk_size]
+        )
+        if not chunk:
+            break
+        
+        months = {}
+        for event in chunk:
+            month = timezone.localtime(event['created_at']).strftime('%Y-%m')
+            months.setdefault(month, []).append(event)
+        
+        for month, events in months.items():
+            path = os.path.join(archive_dir, f"analytics-{month}.jsonl.gz")
+            with open(path, 'ab') as archive:
+                with gzip.GzipFile(fileobj=archive, mode='wb') as compressed:
+                    for event in events:
+                        compressed.write((json.dumps({
+                            'id': str(event['id']),
+                            'resume_id': str(event['resume_id']),
+                            'action': event['action'],
+                            'metadata': _archived_metadata(event),
+                            'created_at': event['created_at'].isoformat(),
+                        }) + '\n').encode('utf-8'))
+                archive.flush()
+                os.fsync(archive.fileno())
+            archived[month] += len(events)
+        
+        with transaction.atomic():
+            ResumeAnalytics.objects.filter(id__in=[event['id'] for event in chunk]).delete()
+    
+    return dict(archived)
@@ -0,0 +1,130 @@
+"""
+Streaming export of the raw analytics history
+
+Events are read with QuerySet.iterator(), so only one chunk of rows is in
+memory at a time, and written out line by line as CSV or NDJSON. The same
+generators back the download view and the export_analytics command.
+"""
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time
+import csv
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+CSV_COLUMNS = ('id', 'resume', 'action', 'created_at', 'ip', 'user_agent', 'referrer', 'metadata')
+
+# Leading characters that make spreadsheet applications evaluate a cell
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class EchoBuffer:
+    """File-like object whose write() returns the data, for streaming csv.writer output"""
+    
+    def write(self, value):
+        return value
+
+
+def _day_boundary(value, end=False):
+    day = parse_date(value) if isinstance(value, str) else value
+    if day is None:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
+    boundary = datetime.combine(day + timezone.timedelta(days=1) if end else day, time.min)
+    return timezone.make_aware(boundary)
+
+
+def filter_events(events, start=None, end=None, actions=None):
+    """
+    Narrow an analytics queryset down for export
+    
+    Args:
+        events: ResumeAnalytics queryset
+        start: First day to include (date or 'YYYY-MM-DD'), or None
+        end: Last day to include (date or 'YYYY-MM-DD'), or None
+        actions: Actions to include, or None for all
+    
+    Returns:
+        QuerySet: The filtered events, oldest first
+    
+    Raises:
+        ValueError: If a date cannot be parsed
+    """
+    if start:
+        events = events.filter(created_at__gte=_day_boundary(start))
+    if end:
+        events = events.filter(created_at__lt=_day_boundary(end, end=True))
+    if actions:
+        events = events.filter(action__in=actions)
+    
+    return events.order_by('created_at', 'id')
+
+
+def _rows(events, chunk_size):
+    from .analytics import unpack_ip
+    
+    fields = ('id', 'resume__slug', 'action', 'created_at', 'metadata', 'ip', 'user_agent__value', 'referrer__url')
+    rows = events.values_list(*fields).iterator(chunk_size=chunk_size)
+    for event_id, slug, action, created_at, metadata, ip, user_agent, referrer in rows:
+        yield {
+            'id': str(event_id),
+            'resume': slug,
+            'action': action,
+            'created_at': created_at.isoformat(),
+            'ip': unpack_ip(ip),
+            'user_agent': user_agent or '',
+            'referrer': referrer or '',
+            'metadata': metadata if isinstance(metadata, dict) else {},
+        }
+
+
+def _csv_cell(value):
+    value = json.dumps(value) if isinstance(value, dict) else str(value or '')
+    if value.startswith(FORMULA_PREFIXES):
+        value = "'" + value
+    return value
+
+
+def stream_events_csv(events, chunk_size=2000):
+    """
+    Yield the events as CSV lines, starting with a header
+    
+    Args:
+        events: ResumeAnalytics queryset
+        chunk_size: Rows fetched from the database at a time
+    
+    Yields:
+        str: One CSV line per event
+    """
+    writer = csv.writer(EchoBuffer())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in _rows(events, chunk_size):
+        yield writer.writerow([_csv_cell(row[column]) for column in CSV_COLUMNS])
+
+
+def stream_events_ndjson(events, chunk_size=2000):
+    """
+    Yield the events as newline-delimited JSON
+    
+    Args:
+        events: ResumeAnalytics queryset
+        chunk_size: Rows fetched from the database at a time
+    
+    Yields:
+        str: One JSON object per line and event
+    """
+    for row in _rows(events, chunk_size):
+        yield json.dumps(row) + '\n'
+
+
+def stream_events(events, export_format='csv', chunk_size=2000):
+    """Yield the events in the given format ('csv' or 'ndjson')"""
+    if export_format == 'ndjson':
+        return stream_events_ndjson(events, chunk_size)
+    return stream_events_csv(events, chunk_size)
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+
+
+def probe_backends_on_first_request(sender, **kwargs):
+    """Probe the PDF backends once the process serves its first request"""
+    from .pdf_backends import probe_backends_in_background
+    
+    request_started.disconnect(dispatch_uid='builder.probe_pdf_backends')
+    probe_backends_in_background()
 
 
 class BuilderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'builder'
+    
+    def ready(self):
+        from django.conf import settings
+        
+        # Probe the PDF backends once per web process instead of on every request.
+        # Waiting for the first request keeps management commands and the PDF
+        # pool workers, which never serve requests, from importing WeasyPrint
+        if getattr(settings, 'PDF_PROBE_ON_STARTUP', True):
+            request_started.connect(probe_backends_on_first_request, dispatch_uid='builder.probe_pdf_backends')
@@ -0,0 +1,159 @@
+"""
+Bulk export of many resumes as a single streamed ZIP archive
+
+Resumes are rendered across the PDF worker pool and each PDF is written to
+the archive as soon as its render finishes. The archive is produced as a
+stream of chunks, so neither the web process nor the command ever holds the
+whole ZIP in memory. A manifest.json entry lists what was exported and what
+failed.
+"""
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import closing
+from django.conf import settings
+from django.utils import timezone
+import itertools
+import json
+import zipfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ZipStreamBuffer:
+    """
+    Write-only file object that collects ZIP output between yields
+    
+    It deliberately has no tell() or seek(), which makes zipfile write
+    streaming-friendly entries with trailing data descriptors.
+    """
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def pop(self):
+        """Return everything written since the last call"""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def render_resume_for_export(resume_id, font='helvetica', color='blue'):
+    """
+    Render one resume of a bulk export
+    
+    Runs inside a worker process, so it only takes and returns picklable values.
+    
+    Args:
+        resume_id: Primary key of the Resume
+        font: Font family to use
+        color: Accent color to use
+    
+    Returns:
+        tuple: (slug, pdf_bytes, error) where error is None on success
+    """
+    from .models import Resume
+    from .pdf_utils import render_pdf_bytes, handle_pdf_error
+    
+    slug = str(resume_id)
+    try:
+        resume = Resume.objects.select_related('template').get(id=resume_id)
+        slug = resume.slug
+        return slug, render_pdf_bytes(resume, resume.template, font, color, source='bulk_export'), None
+    except Exception as e:
+        logger.error(f"Bulk export failed for resume {slug}: {str(e)}")
+        return slug, None, handle_pdf_error(e)
+
+
+def _run_renders(resume_ids, font, color):
+    """
+    Yield render results in completion order, in the worker pool when there is one
+    
+    Only twice as many renders as there are workers are in flight at a time
+    and each one is dropped once its result is yielded, so memory does not
+    grow with the size of the archive. Renders not started yet are cancelled
+    when the consumer stops early, e.g. because the client disconnected.
+    """
+    from .pdf_jobs import get_worker_pool, submit_to_worker_pool
+    
+    if get_worker_pool() is None:
+        for resume_id in resume_ids:
+            yield render_resume_for_export(resume_id, font, color)
+        return
+    
+    window = 2 * getattr(settings, 'PDF_WORKER_PROCESSES', 2)
+    remaining = iter(resume_ids)
+    in_flight = {}
+    try:
+        while True:
+            for resume_id in itertools.islice(remaining, window - len(in_flight)):
+                future = submit_to_worker_pool(render_resume_for_export, resume_id, font, color)
+                in_flight[future] = resume_id
+            if not in_flight:
+                return
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                resume_id = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker itself died; the failure is recorded in the manifest
+                    result = str(resume_id), None, str(e)
+                yield result
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def stream_resumes_zip(resumes, font='helvetica', color='blue'):
+    """
+    Render resumes in parallel and yield the ZIP archive in chunks
+    
+    Args:
+        resumes: Iterable of Resume model instances
+        font: Font family to use (default: helvetica)
+        color: Accent color to use (default: blue)
+    
+    Yields:
+        bytes: The next part of the ZIP archive
+    """
+    resume_ids = [resume.id for resume in resumes]
+    buffer = ZipStreamBuffer()
+    exported = []
+    failures = []
+    
+    # Closed explicitly so pending renders are cancelled as soon as the client goes away
+    renders = _run_renders(resume_ids, font, color)
+    
+    # PDFs are already compressed, so entries are stored rather than deflated
+    with closing(renders), zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for slug, pdf_bytes, error in renders:
+            if error:
+                failures.append({'resume': slug, 'error': error})
+                continue
+            
+            name = f"{slug}.pdf"
+            info = zipfile.ZipInfo(name, date_time=timezone.localtime().timetuple()[:6])
+            archive.writestr(info, pdf_bytes)
+            exported.append(name)
+            
+            yield buffer.pop()
+        
+        manifest = {
+            'generated_at': timezone.now().isoformat(),
+            'font': font,
+            'color': color,
+            'requested': len(resume_ids),
+            'exported': exported,
+            'failures': failures,
+        }
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+    
+    yield buffer.pop()
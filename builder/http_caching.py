@@ -0,0 +1,179 @@
+"""
+Conditional GET and byte-range support for resume responses
+
+ETags are strong validators derived from everything that shapes a response
+(content version, template, font, color and renderer version), so they
+can be computed from a cheap lookup without rendering anything. Views use
+them through Django's `condition` decorator, which answers 304 before the
+view body runs.
+
+PDFs are the exception: every render embeds its generation time, so the
+same inputs do not give the same bytes. Their ETag is a digest of the bytes
+(see get_content_etag), and they additionally honour single byte ranges so
+an interrupted download can be resumed without mixing two renders.
+"""
+from django.http import HttpResponse, FileResponse
+from django.utils.cache import patch_cache_control, quote_etag
+from django.utils.http import content_disposition_header, parse_http_date_safe
+import hashlib
+import re
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_resume_etag(resume, template=None, font='', color='', kind='html'):
+    """
+    Build a strong ETag for one rendering of a resume
+    
+    Args:
+        resume: Resume model instance
+        template: ResumeTemplate model instance the response is rendered with
+        font: Font family (or '' if the response does not depend on it)
+        color: Accent color (or '' if the response does not depend on it)
+        kind: Kind of response, e.g. 'preview', 'public' or 'pdf'
+    
+    Returns:
+        str: Unquoted ETag value
+    """
+    from .pdf_utils import PDF_RENDERER_VERSION
+    
+    parts = [
+        kind,
+        str(resume.pk),
+        str(resume.content_version),
+        str(getattr(template, 'pk', '')),
+        getattr(template, 'name', ''),
+        getattr(template, 'html_template', ''),
+        getattr(template, 'css_template', ''),
+        font,
+        color,
+        PDF_RENDERER_VERSION,
+    ]
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:40]
+
+
+def get_content_etag(content):
+    """
+    Build a strong ETag from the bytes of a response
+    
+    Args:
+        content: The response body
+    
+    Returns:
+        str: Unquoted ETag value
+    """
+    return hashlib.sha256(content).hexdigest()[:40]
+
+
+def memoize_on_request(request, key, loader):
+    """
+    Load an object once per request
+    
+    The etag and last-modified functions of a view and the view itself all
+    need the same resume; this keeps that to a single query.
+    """
+    cache = request.__dict__.setdefault('_conditional_objects', {})
+    if key not in cache:
+        cache[key] = loader()
+    return cache[key]
+
+
+def mark_revalidate(response, private=True):
+    """Let browsers (and, for public responses, proxies) keep the response but revalidate it every time"""
+    if private:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def get_byte_range(request, size, etag=None, last_modified=None):
+    """
+    Work out which part of a response of `size` bytes was requested
+    
+    Only single ranges are supported; anything else is answered in full,
+    which RFC 9110 allows.
+    
+    Args:
+        request: HttpRequest
+        size: Length of the full response body
+        etag: Unquoted ETag of the current representation
+        last_modified: Last modification datetime of the current representation
+    
+    Returns:
+        None for the full body, False if the range cannot be satisfied, or
+        a (first, last) tuple of inclusive byte offsets
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = RANGE_RE.match(header.strip())
+    if request.method != 'GET' or not match:
+        return None
+    
+    # If-Range: only resume a download of the very same representation
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range:
+        if if_range.startswith(('"', 'W/')):
+            if etag is None or if_range != quote_etag(etag):
+                return None
+        else:
+            since = parse_http_date_safe(if_range)
+            if last_modified is None or since is None or int(last_modified.timestamp()) > since:
+                return None
+    
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length:
+            return False
+        return max(0, size - length), size - 1
+    
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        return False
+    
+    return first, last
+
+
+def ranged_file_response(request, pdf_file, size, filename, as_attachment=True, etag=None,
+                         last_modified=None, content_type='application/pdf'):
+    """
+    Build a response for a file, honouring a byte-range request
+    
+    Args:
+        request: HttpRequest
+        pdf_file: Seekable file-like object holding the document
+        size: Size of the document in bytes
+        filename: Download filename
+        as_attachment: Send as an attachment rather than inline
+        etag: Unquoted ETag of the document, used to validate If-Range
+        last_modified: Last modification datetime, used to validate If-Range
+        content_type: MIME type of the document
+    
+    Returns:
+        FileResponse (200), HttpResponse (206 partial content or 416)
+    """
+    byte_range = get_byte_range(request, size, etag, last_modified)
+    
+    if byte_range is None:
+        response = FileResponse(pdf_file, as_attachment=as_attachment, filename=filename, content_type=content_type)
+    elif byte_range is False:
+        pdf_file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    else:
+        first, last = byte_range
+        pdf_file.seek(first)
+        data = pdf_file.read(last - first + 1)
+        pdf_file.close()
+        
+        response = HttpResponse(data, status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,212 @@
+"""
+Incremental live preview pushed to the browser as server-sent events
+
+The stream watches Resume.content_version. When it changes, edits are
+coalesced until the version has been stable for a short debounce window,
+then only the sections of the classic layout whose part of resume.content
+differs from what was last sent are re-rendered and sent. Templates without
+section partials fall back to sending the whole body.
+
+The stream is an async generator and is only offered when the request came
+in through the ASGI application in resume/asgi.py; under WSGI it would tie
+up a worker thread for its whole lifetime, so the preview page polls the
+content version instead.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+import asyncio
+import hashlib
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sections of the classic layout, in document order, with the type of
+# resume.content value each one renders
+SECTIONS = {
+    'personal_info': dict,
+    'summary': str,
+    'work_experience': list,
+    'education': list,
+    'skills': list,
+    'projects': list,
+    'certifications': list,
+    'languages': list,
+    'references': list,
+}
+
+# Template names body.html maps to their own layouts instead of classic.html
+NON_CLASSIC_TEMPLATES = ('Modern', 'Professional', 'Creative', 'Minimal')
+
+
+def is_asgi_request(request):
+    """Check whether a request is served by the ASGI application, which can hold streams open cheaply"""
+    return isinstance(request, ASGIRequest)
+
+
+def uses_sections(template):
+    """Check whether a template renders through the classic section partials"""
+    return getattr(template, 'name', None) not in NON_CLASSIC_TEMPLATES
+
+
+def render_fragments(resume, template=None, sections=None):
+    """
+    Render the preview fragments of a resume
+    
+    Args:
+        resume: Resume model instance
+        template: ResumeTemplate model instance (or None to use resume.template)
+        sections: Sections to render (default: all of them); ignored for
+            layouts without sections, whose body is always rendered whole
+    
+    Returns:
+        dict: Section name to HTML, or {'body': html} for layouts without sections
+    """
+    from .render_cache import render_resume_body, render_resume_section
+    
+    if template is None:
+        template = resume.template
+    
+    if not uses_sections(template):
+        return {'body': render_resume_body(resume, template)}
+    
+    return {section: render_resume_section(resume, section, template) for section in (sections or SECTIONS)}
+
+
+def content_snapshot(resume, template):
+    """
+    Fingerprint the resume content behind each preview fragment
+    
+    Section partials only read their own key of resume.content, so a section
+    whose fingerprint did not change renders exactly as before.
+    
+    Returns:
+        dict: Fragment name to a digest of the content it renders
+    """
+    content = resume.content or {}
+    if not uses_sections(template):
+        # Other layouts read the whole resume, so any new version changes the body
+        names = {'body': resume.content_version}
+    else:
+        names = {section: content.get(section) for section in SECTIONS}
+    
+    return {
+        name: hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        for name, value in names.items()
+    }
+
+
+def format_event(event, data, event_id=None):
+    """Format one server-sent event"""
+    message = f"event: {event}\ndata: {json.dumps(data)}\n"
+    if event_id is not None:
+        # Sent back by the browser as Last-Event-ID when it reconnects
+        message += f"id: {event_id}\n"
+    return message + "\n"
+
+
+async def _get_version(resume_id):
+    from .models import Resume
+    
+    return await Resume.objects.filter(pk=resume_id).values_list('content_version', flat=True).afirst()
+
+
+async def _load(resume_id, template_id):
+    from .models import Resume, ResumeTemplate
+    
+    resume = await Resume.objects.select_related('template').filter(pk=resume_id).afirst()
+    if resume is None:
+        return None, None
+    
+    template = resume.template
+    if template_id:
+        template = await ResumeTemplate.objects.filter(pk=template_id).afirst() or template
+    return resume, template
+
+
+async def preview_events(resume_id, template_id=None, client_version=None):
+    """
+    Yield server-sent events with the preview fragments that changed
+    
+    Args:
+        resume_id: Primary key of the Resume
+        template_id: Template selected in the preview (or None for the resume's own)
+        client_version: content_version of the HTML the browser already shows
+    
+    Yields:
+        str: Encoded events ('section', 'body', 'version') and keep-alive comments
+    """
+    poll_interval = getattr(settings, 'PREVIEW_STREAM_POLL_INTERVAL', 0.5)
+    debounce = getattr(settings, 'PREVIEW_STREAM_DEBOUNCE', 0.3)
+    max_delay = getattr(settings, 'PREVIEW_STREAM_MAX_DELAY', 2.0)
+    keepalive = getattr(settings, 'PREVIEW_STREAM_KEEPALIVE', 15)
+    lifetime = getattr(settings, 'PREVIEW_STREAM_LIFETIME', 300)
+    
+    render = sync_to_async(render_fragments)
+    
+    resume, template = await _load(resume_id, template_id)
+    if resume is None:
+        yield format_event('deleted', {})
+        return
+    
+    snapshot = content_snapshot(resume, template)
+    sent_version = resume.content_version
+    
+    # Ask the browser to reconnect quickly once the stream ends
+    yield "retry: 1000\n\n"
+    
+    # The browser rendered an older version than the current one: resend everything
+    if client_version is not None and client_version != sent_version:
+        for name, html_content in (await render(resume, template)).items():
+            yield format_event('body' if name == 'body' else 'section', {'section': name, 'html': str(html_content)})
+        yield format_event('version', {'version': sent_version}, event_id=sent_version)
+    
+    started = last_sent = time.monotonic()
+    
+    while time.monotonic() - started < lifetime:
+        await asyncio.sleep(poll_interval)
+        
+        version = await _get_version(resume_id)
+        if version is None:
+            yield format_event('deleted', {})
+            return
+        
+        if version == sent_version:
+            if time.monotonic() - last_sent >= keepalive:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            continue
+        
+        # Coalesce a burst of edits: wait until the version stops moving, up to max_delay
+        first_change = time.monotonic()
+        while time.monotonic() - first_change < max_delay:
+            await asyncio.sleep(debounce)
+            latest = await _get_version(resume_id)
+            if latest == version:
+                break
+            version = latest
+        
+        resume, template = await _load(resume_id, template_id)
+        if resume is None:
+            yield format_event('deleted', {})
+            return
+        
+        # Only render the sections whose content changed since the last send;
+        # a template switch to or from the classic layout changes the fragment set
+        latest_snapshot = content_snapshot(resume, template)
+        if set(latest_snapshot) != set(snapshot):
+            changed = list(latest_snapshot)
+        else:
+            changed = [name for name, digest in latest_snapshot.items() if snapshot[name] != digest]
+        snapshot = latest_snapshot
+        
+        if changed:
+            fragments = await render(resume, template, [name for name in changed if name in SECTIONS])
+            for name, html_content in fragments.items():
+                yield format_event('body' if name == 'body' else 'section', {'section': name, 'html': str(html_content)})
+        
+        sent_version = resume.content_version
+        last_sent = time.monotonic()
+        yield format_event('version', {'version': sent_version}, event_id=sent_version)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from builder.models import ResumeAnalytics
+from builder.analytics import replay_orphaned_journals, get_archive_cutoff, get_archive_dir, archive_events
+
+
+class Command(BaseCommand):
+    help = 'Move analytics events past the retention horizon into monthly gzip archives'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Days of raw events to keep (default: ANALYTICS_RETENTION_DAYS)')
+        parser.add_argument('--output', default=None,
+                            help='Archive directory (default: ANALYTICS_ARCHIVE_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Events moved per transaction')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many events would be archived')
+    
+    def handle(self, *args, **options):
+        cutoff = get_archive_cutoff(options['days'])
+        
+        if options['dry_run']:
+            pending = ResumeAnalytics.objects.filter(created_at__lt=cutoff).count()
+            self.stdout.write(f'{pending} event(s) created before {cutoff:%Y-%m-%d} would be archived')
+            return
+        
+        # Archive events still journaled by web workers that have exited, too
+        replay_orphaned_journals()
+        archived = archive_events(cutoff, options['output'], options['chunk_size'])
+        
+        for month, count in sorted(archived.items()):
+            self.stdout.write(f'  {month}: {count} event(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {sum(archived.values())} event(s) to {options['output'] or get_archive_dir()}"
+        ))
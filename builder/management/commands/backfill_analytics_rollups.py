@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from builder.models import ResumeAnalytics
+from builder.analytics import replay_orphaned_journals, rebuild_daily_rollups, rebuild_traffic_sources
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily analytics rollups and top traffic sources from the raw events'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Only rebuild the last N days (default: all history)')
+        parser.add_argument('--resume', default=None,
+                            help='Only rebuild the resume with this slug')
+    
+    def handle(self, *args, **options):
+        # Events of exited web workers may still sit in their journals
+        replay_orphaned_journals()
+        
+        events = ResumeAnalytics.objects.all()
+        if options['days'] is not None:
+            start = timezone.localdate() - timezone.timedelta(days=options['days'] - 1)
+            events = events.filter(created_at__date__gte=start)
+        if options['resume']:
+            events = events.filter(resume__slug=options['resume'])
+        
+        written = rebuild_daily_rollups(events)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} daily rollup row(s)'))
+        
+        # Top sources are not kept per day, so they can only be rebuilt from the full history
+        if options['days'] is None:
+            written = rebuild_traffic_sources(events)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} traffic source sketch(es)'))
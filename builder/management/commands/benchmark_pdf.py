@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from builder.models import ResumeTemplate
+from builder.pdf_benchmark import SIZES, run_benchmark, compare_runs
+from builder.pdf_utils import FONT_FAMILIES, ACCENT_COLORS
+import json
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PDF rendering over synthetic resumes and optionally compare with an earlier run'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='pdf-benchmark.json',
+                            help='Path of the JSON results file to write')
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help='Earlier results file to compare this run against')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Percentage increase counted as a regression (default: 10)')
+        parser.add_argument('--size', action='append', choices=list(SIZES), default=[],
+                            help='Synthetic resume size to render (repeatable, default: all)')
+        parser.add_argument('--template', action='append', default=[],
+                            help="Template name to render, or 'default' (repeatable, default: all)")
+        parser.add_argument('--font', action='append', choices=list(FONT_FAMILIES), default=[],
+                            help='Font family to render (repeatable, default: all)')
+        parser.add_argument('--color', action='append', choices=list(ACCENT_COLORS), default=[],
+                            help='Accent color to render (repeatable, default: all)')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Timed renders per combination (default: 3)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed for the synthetic text')
+    
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {str(e)}")
+        
+        templates = None
+        if options['template']:
+            names = set(options['template'])
+            templates = list(ResumeTemplate.objects.filter(name__in=names).order_by('name'))
+            if 'default' in names:
+                templates.insert(0, None)
+            if not templates:
+                raise CommandError('No templates match the given names')
+        
+        def progress(result):
+            label = f"{result['size']}/{result['template']}/{result['font']}/{result['color']}"
+            if 'error' in result:
+                self.stdout.write(self.style.ERROR(f"{label}: {result['error']}"))
+            else:
+                self.stdout.write(
+                    f"{label}: {result['wall_ms']['median']:.1f} ms, "
+                    f"{result['peak_python_bytes'] // 1024} KiB peak, {result['size_bytes'] // 1024} KiB"
+                )
+        
+        run = run_benchmark(
+            sizes=options['size'] or None,
+            templates=templates,
+            fonts=options['font'] or None,
+            colors=options['color'] or None,
+            repeat=max(1, options['repeat']),
+            seed=options['seed'],
+            progress=progress,
+        )
+        
+        with open(options['output'], 'w') as output:
+            json.dump(run, output, indent=2)
+        
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(run['results'])} result(s) to {options['output']}"))
+        
+        if baseline is None:
+            return
+        
+        comparisons = compare_runs(baseline, run, options['threshold'])
+        regressions = [comparison for comparison in comparisons if comparison['regressed']]
+        
+        for comparison in regressions:
+            changes = ', '.join(
+                f"{name} {value:+.1f}%" for name, value in comparison['changes'].items() if value is not None
+            )
+            self.stdout.write(self.style.WARNING(
+                f"{comparison['size']}/{comparison['template']}/{comparison['font']}/{comparison['color']}: {changes}"
+            ))
+        
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} of {len(comparisons)} combination(s) regressed by more than {options['threshold']}%"
+            )
+        
+        self.stdout.write(self.style.SUCCESS(f"No regressions across {len(comparisons)} combination(s)"))
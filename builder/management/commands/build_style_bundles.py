@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from builder.models import ResumeTemplate
+from builder.pdf_renderer import find_template_stylesheets
+from builder.pdf_utils import FONT_FAMILIES, ACCENT_COLORS
+from builder.style_bundles import MEDIA_TYPES, get_bundle_dir, write_bundle
+import os
+
+
+class Command(BaseCommand):
+    help = 'Precompile stylesheet bundles for every template, font and color'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Remove existing bundles first')
+    
+    def handle(self, *args, **options):
+        bundle_dir = get_bundle_dir()
+        
+        if options['clear'] and os.path.isdir(bundle_dir):
+            for name in os.listdir(bundle_dir):
+                if name.endswith('.css'):
+                    os.remove(os.path.join(bundle_dir, name))
+        
+        # Templates in the database plus any stylesheet shipped in static files
+        css_templates = set(ResumeTemplate.objects.values_list('css_template', flat=True))
+        css_templates.update(find_template_stylesheets())
+        css_templates.add(None)
+        
+        count = 0
+        for css_template in css_templates:
+            for font in FONT_FAMILIES:
+                for color in ACCENT_COLORS:
+                    for media in MEDIA_TYPES:
+                        write_bundle(css_template, font, color, media)
+                        count += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Built {count} stylesheet bundle(s) in {bundle_dir}'))
@@ -0,0 +1,42 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from builder.models import ResumeAnalytics
+from builder.analytics import replay_orphaned_journals
+from builder.analytics_export import FORMATS, filter_events, stream_events
+
+
+class Command(BaseCommand):
+    help = 'Stream analytics events to a CSV or NDJSON file'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the file to write ('-' for stdout)")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help='Output format')
+        parser.add_argument('--resume', action='append', default=[], help='Resume slug to export (repeatable)')
+        parser.add_argument('--start', help='First day to include (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to include (YYYY-MM-DD)')
+        parser.add_argument('--action', action='append', default=[], help='Action to include (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched from the database at a time')
+    
+    def handle(self, *args, **options):
+        # Include events left in the journals of exited web workers
+        replay_orphaned_journals()
+        
+        events = ResumeAnalytics.objects.all()
+        if options['resume']:
+            events = events.filter(resume__slug__in=options['resume'])
+        
+        try:
+            events = filter_events(events, options['start'], options['end'], options['action'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        output = sys.stdout if options['output'] == '-' else open(options['output'], 'w', newline='', encoding='utf-8')
+        try:
+            for line in stream_events(events, options['format'], options['chunk_size']):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        
+        if output is not sys.stdout:
+            self.stdout.write(self.style.SUCCESS(f"Exported analytics to {options['output']}"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from builder.models import Resume
+from builder.bulk_export import stream_resumes_zip
+
+
+class Command(BaseCommand):
+    help = 'Render resumes in parallel and write them to a ZIP archive'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the ZIP file to write')
+        parser.add_argument('--user', help='Only export resumes owned by this username')
+        parser.add_argument('--slug', action='append', default=[], help='Resume slug to export (repeatable)')
+        parser.add_argument('--font', default='helvetica', help='Font family to use')
+        parser.add_argument('--color', default='blue', help='Accent color to use')
+    
+    def handle(self, *args, **options):
+        resumes = Resume.objects.all()
+        
+        if options['user']:
+            resumes = resumes.filter(
+                Q(user__username=options['user']) | Q(user_profile__user__username=options['user'])
+            )
+        if options['slug']:
+            resumes = resumes.filter(slug__in=options['slug'])
+        
+        count = resumes.count()
+        if not count:
+            raise CommandError('No resumes match the given filters')
+        
+        with open(options['output'], 'wb') as output:
+            for chunk in stream_resumes_zip(resumes, options['font'], options['color']):
+                output.write(chunk)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {count} resume(s) to {options['output']} (see manifest.json for failures)"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from builder.analytics import flush_events, replay_orphaned_journals
+
+
+class Command(BaseCommand):
+    help = 'Store buffered analytics events and replay journals left by crashed processes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Also replay journals of running processes (only while the site is stopped)')
+    
+    def handle(self, *args, **options):
+        flushed = flush_events()
+        replayed = replay_orphaned_journals(include_live=options['all'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {flushed} buffered and {replayed} journaled event(s)'
+        ))
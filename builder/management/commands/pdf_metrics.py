@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from builder.models import PDFRenderMetric
+from builder.pdf_metrics import PHASES, summarize_by_label
+
+
+class Command(BaseCommand):
+    help = 'Print PDF render latency percentiles and throughput'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24,
+                            help='Size of the window to summarize')
+        parser.add_argument('--by', choices=['template', 'font', 'color', 'source'], default=None,
+                            help='Break the summary down by this label')
+        parser.add_argument('--prune-days', type=int, default=None,
+                            help='Delete metrics older than this many days first')
+    
+    def handle(self, *args, **options):
+        if options['hours'] < 1:
+            raise CommandError('--hours must be at least 1')
+        
+        if options['prune_days'] is not None:
+            cutoff = timezone.now() - timezone.timedelta(days=options['prune_days'])
+            deleted, _ = PDFRenderMetric.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(f'Deleted {deleted} metric row(s)')
+        
+        summary = summarize_by_label(options['hours'], options['by'])
+        if not options['by']:
+            summary = {'all renders': summary}
+        
+        for label, data in summary.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{label or 'default'}: {data['renders']} render(s), {data['renders_per_hour']:.2f}/hour"
+            ))
+            for phase in PHASES + ('total',):
+                percentiles = data['phases_ms'][phase]['percentiles']
+                formatted = ', '.join(
+                    f"{name}={value:.1f}ms" if value is not None else f"{name}=-"
+                    for name, value in percentiles.items()
+                )
+                self.stdout.write(f"  {phase:<7} {formatted}")
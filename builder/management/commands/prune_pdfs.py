@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from builder.pdf_storage import get_pdf_store
+
+
+class Command(BaseCommand):
+    help = 'Evict least recently used PDF files until the store fits its quota'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--max-bytes', type=int, default=None,
+                            help='Shrink the store to this size instead of the configured quota')
+    
+    def handle(self, *args, **options):
+        store = get_pdf_store()
+        target = options['max_bytes']
+        
+        if target is None and not store.quota:
+            self.stdout.write('PDF_STORE_QUOTA_BYTES is 0, nothing to evict')
+            return
+        
+        removed, freed = store.evict(target)
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} file(s), freed {freed} bytes, store is now {store.get_size()} bytes'
+        ))
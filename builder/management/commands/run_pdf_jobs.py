@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from builder.pdf_jobs import process_pending_jobs, requeue_stale_jobs
+import time
+
+
+class Command(BaseCommand):
+    help = 'Render pending background PDF jobs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to wait between polls')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum jobs to render per poll')
+        parser.add_argument('--requeue-after', type=int, default=600,
+                            help='Requeue jobs that have been running for this many seconds')
+    
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_jobs(options['requeue_after'])
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+            
+            processed = process_pending_jobs(limit=options['limit'])
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'Rendered {processed} job(s)'))
+            
+            if options['once']:
+                break
+            
+            time.sleep(options['interval'])
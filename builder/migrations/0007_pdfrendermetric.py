@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0006_pdfrenderjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFRenderMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50)),
+                ('template', models.CharField(blank=True, max_length=50)),
+                ('font', models.CharField(max_length=50)),
+                ('color', models.CharField(max_length=50)),
+                ('html_ms', models.FloatField(default=0)),
+                ('css_ms', models.FloatField(default=0)),
+                ('layout_ms', models.FloatField(default=0)),
+                ('write_ms', models.FloatField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('pages', models.PositiveIntegerField(blank=True, null=True)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0007_pdfrendermetric'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='content_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
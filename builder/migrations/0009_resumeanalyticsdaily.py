@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0008_resume_content_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeAnalyticsDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('viewed', 'Viewed'), ('pdf_generated', 'PDF Generated'), ('duplicated', 'Duplicated'), ('share_status_changed', 'Share Status Changed')], max_length=50)),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_analytics', to='builder.resume')),
+            ],
+            options={
+                'verbose_name_plural': 'Resume Analytics (daily)',
+                'ordering': ['-date'],
+                'unique_together': {('resume', 'action', 'date')},
+            },
+        ),
+    ]
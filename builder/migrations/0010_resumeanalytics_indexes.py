@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0009_resumeanalyticsdaily'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resumeanalytics',
+            index=models.Index(fields=['resume', 'action', 'created_at'], name='analytics_resume_action_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumeanalytics',
+            index=models.Index(fields=['resume', '-created_at'], name='analytics_resume_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumeanalytics',
+            index=models.Index(fields=['created_at'], name='analytics_created_idx'),
+        ),
+    ]
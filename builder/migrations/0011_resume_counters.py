@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    """
+    Set the counters from the events recorded so far
+
+    The counts are computed by the database in a single UPDATE, so resume ids
+    are never loaded (legacy rows may hold ids that are not valid UUIDs).
+    """
+    Resume = apps.get_model('builder', 'Resume')
+    ResumeAnalytics = apps.get_model('builder', 'ResumeAnalytics')
+
+    def count_events(action):
+        events = (
+            ResumeAnalytics.objects.filter(resume=OuterRef('pk'), action=action)
+            .order_by()
+            .values('resume')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return Coalesce(Subquery(events), 0)
+
+    Resume.objects.update(
+        view_count=count_events('viewed'),
+        download_count=count_events('pdf_generated'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0010_resumeanalytics_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
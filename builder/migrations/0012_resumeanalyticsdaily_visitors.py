@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0011_resume_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumeanalyticsdaily',
+            name='visitors',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
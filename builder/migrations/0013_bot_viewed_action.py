@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0012_resumeanalyticsdaily_visitors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resumeanalytics',
+            name='action',
+            field=models.CharField(choices=[('viewed', 'Viewed'), ('pdf_generated', 'PDF Generated'), ('duplicated', 'Duplicated'), ('share_status_changed', 'Share Status Changed'), ('bot_viewed', 'Viewed by Bot')], default='viewed', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='resumeanalyticsdaily',
+            name='action',
+            field=models.CharField(choices=[('viewed', 'Viewed'), ('pdf_generated', 'PDF Generated'), ('duplicated', 'Duplicated'), ('share_status_changed', 'Share Status Changed'), ('bot_viewed', 'Viewed by Bot')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0013_bot_viewed_action'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Referrer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.TextField()),
+                ('url_hash', models.CharField(max_length=40, unique=True)),
+                ('domain', models.CharField(blank=True, db_index=True, max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.TextField()),
+                ('value_hash', models.CharField(max_length=40, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='resumeanalytics',
+            name='ip',
+            field=models.BinaryField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='resumeanalytics',
+            name='referrer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='builder.referrer'),
+        ),
+        migrations.AddField(
+            model_name='resumeanalytics',
+            name='user_agent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='builder.useragent'),
+        ),
+    ]
@@ -0,0 +1,142 @@
+import hashlib
+import ipaddress
+import json
+from urllib.parse import urlsplit
+
+from django.db import migrations, models, transaction
+from django.db.models.functions import Cast
+
+CHUNK_SIZE = 2000
+MAX_LOOKUP_LENGTH = 1024
+UUID_RE = r'^[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}$'
+
+
+def _hash(value):
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def _pack_ip(ip):
+    try:
+        return ipaddress.ip_address(str(ip or '').strip()).packed
+    except ValueError:
+        return None
+
+
+def _domain(url):
+    try:
+        host = (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def _load_metadata(metadata):
+    if isinstance(metadata, str):
+        # Stored as a JSON string by the old set_metadata()
+        try:
+            metadata = json.loads(metadata or '{}')
+        except ValueError:
+            return {}
+    return dict(metadata) if isinstance(metadata, dict) else {}
+
+
+def _intern(model, field, values, **extra):
+    hash_field = f"{field}_hash"
+    hashes = {value: _hash(value) for value in values if value}
+    if not hashes:
+        return {}
+    model.objects.bulk_create(
+        [model(**{field: value, hash_field: value_hash}, **{name: compute(value) for name, compute in extra.items()})
+         for value, value_hash in hashes.items()],
+        ignore_conflicts=True,
+    )
+    found = {getattr(obj, hash_field): obj.pk for obj in model.objects.filter(**{f"{hash_field}__in": list(hashes.values())})}
+    return {value: found[value_hash] for value, value_hash in hashes.items()}
+
+
+def _events(model):
+    # Rows left over from before the UUID primary key (ids such as "1") cannot
+    # be loaded, so they are filtered out in SQL and keep their old metadata
+    return model.objects.annotate(event_key=Cast('pk', models.CharField())).filter(event_key__regex=UUID_RE)
+
+
+def compact_metadata(apps, schema_editor):
+    """Move ip, user_agent and referrer out of metadata into the compact columns, one chunk at a time"""
+    ResumeAnalytics = apps.get_model('builder', 'ResumeAnalytics')
+    UserAgent = apps.get_model('builder', 'UserAgent')
+    Referrer = apps.get_model('builder', 'Referrer')
+
+    last_pk = None
+    while True:
+        chunk = _events(ResumeAnalytics).order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk.only('pk', 'metadata', 'ip', 'user_agent', 'referrer')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        details = []
+        for row in chunk:
+            metadata = _load_metadata(row.metadata)
+            user_agent = str(metadata.pop('user_agent', None) or '')[:MAX_LOOKUP_LENGTH]
+            referrer = str(metadata.pop('referrer', None) or '')[:MAX_LOOKUP_LENGTH]
+            details.append((row, metadata, metadata.pop('ip', None), user_agent, referrer))
+
+        with transaction.atomic():
+            user_agents = _intern(UserAgent, 'value', {item[3] for item in details})
+            referrers = _intern(Referrer, 'url', {item[4] for item in details}, domain=_domain)
+
+            # Rows converted by an interrupted earlier run keep their columns
+            for row, metadata, ip, user_agent, referrer in details:
+                row.metadata = metadata
+                if ip:
+                    row.ip = _pack_ip(ip)
+                if user_agent:
+                    row.user_agent_id = user_agents[user_agent]
+                if referrer:
+                    row.referrer_id = referrers[referrer]
+
+            ResumeAnalytics.objects.bulk_update(chunk, ['metadata', 'ip', 'user_agent', 'referrer'])
+
+
+def expand_metadata(apps, schema_editor):
+    """Put the compact columns back into metadata"""
+    ResumeAnalytics = apps.get_model('builder', 'ResumeAnalytics')
+
+    last_pk = None
+    while True:
+        chunk = _events(ResumeAnalytics).select_related('user_agent', 'referrer').defer('resume').order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        for row in chunk:
+            metadata = _load_metadata(row.metadata)
+            if row.ip:
+                metadata['ip'] = str(ipaddress.ip_address(bytes(row.ip)))
+            if row.user_agent_id:
+                metadata['user_agent'] = row.user_agent.value
+            if row.referrer_id:
+                metadata['referrer'] = row.referrer.url
+            row.metadata = metadata
+
+        with transaction.atomic():
+            ResumeAnalytics.objects.bulk_update(chunk, ['metadata'])
+
+
+class Migration(migrations.Migration):
+
+    # Each chunk commits on its own so large tables are not converted in one transaction
+    atomic = False
+
+    dependencies = [
+        ('builder', '0014_compact_analytics_schema'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_metadata, expand_metadata),
+    ]
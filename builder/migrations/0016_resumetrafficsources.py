@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0015_compact_analytics_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeTrafficSources',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('referrer_domain', 'Referrer Domain'), ('utm_source', 'UTM Source')], max_length=20)),
+                ('sketch', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='traffic_sources', to='builder.resume')),
+            ],
+            options={
+                'verbose_name_plural': 'Resume Traffic Sources',
+                'unique_together': {('resume', 'kind')},
+            },
+        ),
+    ]
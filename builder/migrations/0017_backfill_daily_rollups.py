@@ -0,0 +1,108 @@
+import hashlib
+import ipaddress
+import uuid
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+
+BATCH_SIZE = 500
+UUID_RE = r'^[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}$'
+
+# Precision of the visitor sketches (256 one-byte registers)
+HLL_PRECISION = 8
+
+
+# Frozen copies of builder.analytics.unpack_ip / get_visitor_key and
+# builder.sketches.HyperLogLog.add, so later changes to the app cannot
+# change what this migration writes
+
+def _unpack_ip(packed):
+    return str(ipaddress.ip_address(bytes(packed))) if packed else ''
+
+
+def _visitor_key(ip, user_agent):
+    ip = ip or ''
+    user_agent = user_agent or ''
+    return f"{ip}|{user_agent}" if ip or user_agent else ''
+
+
+def _add_to_sketch(registers, value):
+    x = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+    index = x >> (64 - HLL_PRECISION)
+    rest = x & ((1 << (64 - HLL_PRECISION)) - 1)
+    rank = (64 - HLL_PRECISION) - rest.bit_length() + 1
+    if rank > registers[index]:
+        registers[index] = rank
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    """
+    Fill the daily rollups and visitor sketches from the events recorded before they existed
+
+    Rollups are upserted per resume, action and day, so running this again
+    (or after new events were already rolled up) gives the same result.
+    """
+    ResumeAnalytics = apps.get_model('builder', 'ResumeAnalytics')
+    ResumeAnalyticsDaily = apps.get_model('builder', 'ResumeAnalyticsDaily')
+
+    # Resume ids are read as text; rows left over from before the UUID
+    # primary key would not convert and have no rollup to go into anyway
+    events = (
+        ResumeAnalytics.objects.order_by()
+        .annotate(resume_key=Cast('resume_id', models.CharField()))
+        .filter(resume_key__regex=UUID_RE)
+    )
+
+    # Unique visitors per resume and day, keyed as at ingestion
+    sketches = {}
+    views = events.filter(action='viewed').values_list('resume_key', 'created_at', 'ip', 'user_agent__value')
+    for resume_key, created_at, ip, user_agent in views.iterator(chunk_size=2000):
+        key = _visitor_key(_unpack_ip(ip), user_agent)
+        if key:
+            registers = sketches.setdefault((resume_key, timezone.localdate(created_at)), bytearray(1 << HLL_PRECISION))
+            _add_to_sketch(registers, key)
+
+    totals = (
+        events.annotate(day=TruncDate('created_at'))
+        .values('resume_key', 'action', 'day')
+        .annotate(total=Count('id'))
+    )
+
+    rollups = []
+    for total in totals.iterator(chunk_size=2000):
+        sketch = sketches.get((total['resume_key'], total['day'])) if total['action'] == 'viewed' else None
+        rollups.append(ResumeAnalyticsDaily(
+            resume_id=uuid.UUID(total['resume_key']),
+            action=total['action'],
+            date=total['day'],
+            count=total['total'],
+            visitors=bytes(sketch) if sketch else None,
+        ))
+        if len(rollups) >= BATCH_SIZE:
+            _upsert(ResumeAnalyticsDaily, rollups)
+            rollups = []
+
+    _upsert(ResumeAnalyticsDaily, rollups)
+
+
+def _upsert(model, rollups):
+    if rollups:
+        model.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=['resume', 'action', 'date'],
+            update_fields=['count', 'visitors'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0016_resumetrafficsources'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ from django.utils.text import slugify
 from django.utils import timezone
 import uuid
 import json
+import ipaddress
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -138,23 +139,66 @@ class Resume(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_public = models.BooleanField(default=False)
     share_token = models.CharField(max_length=100, blank=True, null=True, unique=True)
+    # Bumped on every save; keys the rendered HTML fragment cache
+    content_version = models.PositiveIntegerField(default=1, editable=False)
+    # Maintained with F() increments when analytics events are flushed
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    download_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    COUNTER_FIELDS = ('view_count', 'download_count')
     
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.title)
             unique_id = str(uuid.uuid4())[:8]
             self.slug = f"{base_slug}-{unique_id}"
+        
+        bump_version = not self._state.adding
+        if bump_version:
+            # Incremented in SQL so two saves of the same loaded version
+            # still end up with two different versions
+            self.content_version = models.F('content_version') + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                # Never write back counters loaded before the latest increments
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                ]
+            kwargs['update_fields'] = set(update_fields) | {'content_version'}
+        
         super().save(*args, **kwargs)
+        
+        if bump_version:
+            self.refresh_from_db(fields=['content_version'])
     
     def __str__(self):
         return self.title
 
+class UserAgent(models.Model):
+    """Distinct user-agent string, shared by all analytics events that sent it"""
+    value = models.TextField()
+    value_hash = models.CharField(max_length=40, unique=True)
+    
+    def __str__(self):
+        return self.value[:80]
+
+class Referrer(models.Model):
+    """Distinct referrer URL, shared by all analytics events that came from it"""
+    url = models.TextField()
+    url_hash = models.CharField(max_length=40, unique=True)
+    domain = models.CharField(max_length=255, blank=True, db_index=True)
+    
+    def __str__(self):
+        return self.url[:80]
+
 class ResumeAnalytics(models.Model):
     ACTION_CHOICES = (
         ('viewed', 'Viewed'),
         ('pdf_generated', 'PDF Generated'),
         ('duplicated', 'Duplicated'),
         ('share_status_changed', 'Share Status Changed'),
+        ('bot_viewed', 'Viewed by Bot'),
     )
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -162,16 +206,47 @@ class ResumeAnalytics(models.Model):
     action = models.CharField(max_length=50, choices=ACTION_CHOICES, default='viewed')
     metadata = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # Request details of the event: the IP packed to 4 or 16 bytes, user
+    # agent and referrer interned; metadata keeps only the other details
+    ip = models.BinaryField(max_length=16, null=True, blank=True)
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    referrer = models.ForeignKey(Referrer, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Resume Analytics'
+        indexes = [
+            # Per-resume counts and trends by action
+            models.Index(fields=['resume', 'action', 'created_at'], name='analytics_resume_action_idx'),
+            # Most recent events of a resume (analytics page activity list)
+            models.Index(fields=['resume', '-created_at'], name='analytics_resume_recent_idx'),
+            # Admin listing and the archival range scans
+            models.Index(fields=['created_at'], name='analytics_created_idx'),
+        ]
+    
+    @property
+    def ip_address(self):
+        """The IP address as text ('' if unknown)"""
+        return str(ipaddress.ip_address(bytes(self.ip))) if self.ip else ''
     
     def set_metadata(self, data):
-        self.metadata = json.dumps(data)
+        self.metadata = dict(data)
     
     def get_metadata(self):
-        return json.loads(self.metadata)
+        """Return the metadata with the request details merged back in"""
+        metadata = self.metadata
+        if isinstance(metadata, str):
+            # Written by an older set_metadata() as a JSON string
+            metadata = json.loads(metadata or '{}')
+        metadata = dict(metadata or {})
+        
+        if self.ip:
+            metadata['ip'] = self.ip_address
+        if self.user_agent_id:
+            metadata['user_agent'] = self.user_agent.value
+        if self.referrer_id:
+            metadata['referrer'] = self.referrer.url
+        return metadata
     
     def log_view(self):
         """Log a view event for the resume"""
@@ -184,4 +259,91 @@ class ResumeAnalytics(models.Model):
         self.save()
     
     def __str__(self):
-        return f"{self.get_action_display()} - {self.resume.title} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"{self.get_action_display()} - {self.resume.title} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+class ResumeAnalyticsDaily(models.Model):
+    """Number of analytics events per resume, action and day"""
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='daily_analytics')
+    action = models.CharField(max_length=50, choices=ResumeAnalytics.ACTION_CHOICES)
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    # HyperLogLog sketch (builder.sketches) of the visitors of 'viewed' events
+    visitors = models.BinaryField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-date']
+        unique_together = ('resume', 'action', 'date')
+        verbose_name_plural = 'Resume Analytics (daily)'
+    
+    def __str__(self):
+        return f"{self.get_action_display()} - {self.resume.title} - {self.date}: {self.count}"
+
+class ResumeTrafficSources(models.Model):
+    """Approximate top referrer domains or campaign sources of a resume's views"""
+    KIND_CHOICES = (
+        ('referrer_domain', 'Referrer Domain'),
+        ('utm_source', 'UTM Source'),
+    )
+    
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='traffic_sources')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # SpaceSaving sketch (builder.sketches) as returned by to_dict()
+    sketch = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('resume', 'kind')
+        verbose_name_plural = 'Resume Traffic Sources'
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.resume.title}"
+
+class PDFRenderJob(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='pdf_jobs')
+    template = models.ForeignKey(ResumeTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    font = models.CharField(max_length=50, default='helvetica')
+    color = models.CharField(max_length=50, default='blue')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    filename = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"PDF job {self.id} for {self.resume.title} ({self.get_status_display()})"
+
+
+class PDFRenderMetric(models.Model):
+    source = models.CharField(max_length=50)
+    template = models.CharField(max_length=50, blank=True)
+    font = models.CharField(max_length=50)
+    color = models.CharField(max_length=50)
+    html_ms = models.FloatField(default=0)
+    css_ms = models.FloatField(default=0)
+    layout_ms = models.FloatField(default=0)
+    write_ms = models.FloatField(default=0)
+    total_ms = models.FloatField(default=0)
+    pages = models.PositiveIntegerField(null=True, blank=True)
+    size_bytes = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.source} render of {self.template or 'default'} in {self.total_ms:.0f} ms"
@@ -0,0 +1,313 @@
+"""
+Registry of PDF rendering backends with health probes and circuit breakers
+
+Each backend listed in PDF_BACKENDS is probed once per process, in a
+background thread so no request waits for it, and in a sandbox worker when
+renders run there, so the web process never loads the rendering libraries.
+A circuit breaker per backend stops sending renders to it after repeated
+failures or slow renders; callers then go straight to the HTML/print
+fallback while the backend is re-probed in the background.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .pdf_sandbox import PDFRenderLimitExceeded, probe_in_sandbox, renders_in_process
+import sys
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PDFBackendUnavailable(Exception):
+    """Raised when no PDF backend is healthy enough to render"""
+
+
+class PDFBackend:
+    """Base class for PDF rendering backends"""
+    
+    name = None
+    
+    def probe(self):
+        """Check that the backend can render, raising an exception if it cannot"""
+        raise NotImplementedError
+    
+    def render(self, html_content, template=None, font='helvetica', color='blue', custom_styles='', timer=None):
+        """Render resume HTML to PDF bytes, reporting phases to the optional RenderTimer"""
+        raise NotImplementedError
+
+
+class WeasyPrintBackend(PDFBackend):
+    """Renders PDFs with the shared, pre-warmed WeasyPrint renderer"""
+    
+    name = 'weasyprint'
+    
+    def probe(self):
+        from .pdf_renderer import get_renderer
+        
+        # Building the renderer imports WeasyPrint and parses the stylesheets
+        renderer = get_renderer()
+        
+        # On Windows, render a tiny document since missing GTK libraries only
+        # show up once WeasyPrint actually lays out a page
+        if sys.platform.startswith('win'):
+            renderer.write_pdf('<html><body><p>probe</p></body></html>', [])
+    
+    def render(self, html_content, template=None, font='helvetica', color='blue', custom_styles='', timer=None):
+        from .pdf_renderer import get_renderer
+        from .pdf_metrics import RenderTimer
+        
+        timer = timer or RenderTimer()
+        renderer = get_renderer()
+        
+        with timer.phase('css'):
+            stylesheets = renderer.get_stylesheets(template, font, color, custom_styles)
+        
+        return renderer.write_pdf(html_content, stylesheets, timer=timer)
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures of a backend
+    
+    The breaker opens after `failure_threshold` consecutive failures and
+    stays open until a background probe succeeds.
+    """
+    
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+    
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+    
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+    
+    def record_failure(self):
+        """Count a failure, returning True if this failure opened the breaker"""
+        with self.lock:
+            self.failures += 1
+            if self.opened_at is None and self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+    
+    def trip(self):
+        """Open the breaker straight away, e.g. after a failed probe"""
+        with self.lock:
+            self.failures = max(self.failures, self.failure_threshold)
+            newly_opened = self.opened_at is None
+            if newly_opened:
+                self.opened_at = time.monotonic()
+            return newly_opened
+
+
+class BackendRegistry:
+    """Holds the configured backends together with their health and breakers"""
+    
+    def __init__(self, backend_paths=None):
+        if backend_paths is None:
+            backend_paths = getattr(settings, 'PDF_BACKENDS', ['builder.pdf_backends.WeasyPrintBackend'])
+        
+        self.backends = [import_string(path)() for path in backend_paths]
+        self.breakers = {
+            backend.name: CircuitBreaker(
+                failure_threshold=getattr(settings, 'PDF_BREAKER_FAILURE_THRESHOLD', 3),
+                reset_timeout=getattr(settings, 'PDF_BREAKER_RESET_TIMEOUT', 60),
+            )
+            for backend in self.backends
+        }
+        self.status = {backend.name: {'available': None, 'error': '', 'probed_at': None} for backend in self.backends}
+        self.render_timeout = getattr(settings, 'PDF_RENDER_TIMEOUT', 30)
+        self.probe_lock = threading.Lock()
+        self.probed = False
+        # Separate from probe_lock, which is held for the whole probe
+        self.start_lock = threading.Lock()
+        self.probe_started = False
+    
+    def probe(self, backend, quiet=False):
+        """Probe one backend and update its health, returning True if it works"""
+        try:
+            if renders_in_process():
+                backend.probe()
+            else:
+                probe_in_sandbox(backend)
+        except Exception as e:
+            # Repeated background probes of a dead backend only log at debug level
+            log = logger.debug if quiet else logger.error
+            log(f"PDF backend {backend.name} failed its probe: {str(e)}")
+            self.status[backend.name] = {'available': False, 'error': str(e), 'probed_at': time.time()}
+            return False
+        
+        self.status[backend.name] = {'available': True, 'error': '', 'probed_at': time.time()}
+        return True
+    
+    def probe_all(self):
+        """Probe every backend once, unless that has already happened"""
+        with self.probe_lock:
+            if self.probed:
+                return
+            for backend in self.backends:
+                if not self.probe(backend):
+                    self.open_breaker(backend)
+            self.probed = True
+    
+    def start_probe(self):
+        """Run probe_all() in a background thread, unless that has already been started"""
+        with self.start_lock:
+            if self.probe_started or self.probed:
+                return
+            self.probe_started = True
+        
+        thread = threading.Thread(target=self.probe_all, daemon=True)
+        thread.start()
+    
+    def open_breaker(self, backend):
+        """Open a backend's breaker and schedule a background re-probe"""
+        if self.breakers[backend.name].trip():
+            self.schedule_reprobe(backend)
+    
+    def schedule_reprobe(self, backend):
+        """Re-probe a backend after the reset timeout, closing its breaker on success"""
+        breaker = self.breakers[backend.name]
+        
+        def reprobe():
+            if self.probe(backend, quiet=True):
+                logger.info(f"PDF backend {backend.name} recovered, closing circuit breaker")
+                breaker.record_success()
+            else:
+                self.schedule_reprobe(backend)
+        
+        timer = threading.Timer(breaker.reset_timeout, reprobe)
+        timer.daemon = True
+        timer.start()
+    
+    def available_backends(self):
+        """
+        Return the backends whose breakers are closed, in priority order
+        
+        Backends that have not been probed yet count as available, so no
+        request waits for the probe; one that cannot render fails its first
+        renders and opens its breaker.
+        """
+        self.start_probe()
+        return [
+            backend for backend in self.backends
+            if self.status[backend.name]['available'] is not False and not self.breakers[backend.name].is_open
+        ]
+    
+    def is_available(self):
+        """Check whether any backend can currently take a render"""
+        return bool(self.available_backends())
+    
+    def render(self, html_content, template=None, font='helvetica', color='blue', custom_styles='', timer=None):
+        """
+        Render with the first healthy backend, trying the next one on failure
+        
+        Returns:
+            bytes: The PDF document
+        
+        Raises:
+            PDFBackendUnavailable: If every breaker is open
+            Exception: The last backend error if every attempt failed
+        """
+        backends = self.available_backends()
+        if not backends:
+            raise PDFBackendUnavailable("No PDF backend is currently available")
+        
+        last_error = None
+        for backend in backends:
+            breaker = self.breakers[backend.name]
+            started = time.monotonic()
+            try:
+                pdf_bytes = backend.render(html_content, template, font, color, custom_styles, timer=timer)
+            except (PDFRenderLimitExceeded, MemoryError):
+                # The resume overran its sandbox limits; that says nothing about the backend
+                raise
+            except Exception as e:
+                last_error = e
+                if breaker.record_failure():
+                    logger.error(f"PDF backend {backend.name} keeps failing, opening circuit breaker")
+                    self.schedule_reprobe(backend)
+                continue
+            
+            # A render that took too long counts against the backend, but its output is still used
+            elapsed = time.monotonic() - started
+            if self.render_timeout and elapsed > self.render_timeout:
+                logger.warning(f"PDF backend {backend.name} took {elapsed:.1f}s to render")
+                if breaker.record_failure():
+                    logger.error(f"PDF backend {backend.name} keeps timing out, opening circuit breaker")
+                    self.schedule_reprobe(backend)
+            else:
+                breaker.record_success()
+            
+            return pdf_bytes
+        
+        raise last_error
+    
+    def report_failure(self):
+        """
+        Count a failure seen outside this process against the first available backend
+        
+        Used for renders in sandbox workers that crashed, hung or timed out,
+        since the breakers inside the workers are invisible to this process.
+        """
+        backends = self.available_backends()
+        if not backends:
+            return
+        
+        backend = backends[0]
+        if self.breakers[backend.name].record_failure():
+            logger.error(f"PDF backend {backend.name} keeps failing in the sandbox, opening circuit breaker")
+            self.schedule_reprobe(backend)
+    
+    def report_success(self):
+        """Reset the failure count of the first available backend after a sandboxed render"""
+        backends = self.available_backends()
+        if backends:
+            self.breakers[backends[0].name].record_success()
+    
+    def health(self):
+        """
+        Describe the state of every backend
+        
+        Returns:
+            list: One dict per backend with its probe result and breaker state
+        """
+        return [
+            {
+                'name': backend.name,
+                'available': self.status[backend.name]['available'],
+                'error': self.status[backend.name]['error'],
+                'probed_at': self.status[backend.name]['probed_at'],
+                'breaker_open': self.breakers[backend.name].is_open,
+                'consecutive_failures': self.breakers[backend.name].failures,
+            }
+            for backend in self.backends
+        ]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_backend_registry():
+    """Return the backend registry for this process"""
+    global _registry
+    
+    with _registry_lock:
+        if _registry is None:
+            _registry = BackendRegistry()
+        return _registry
+
+
+def probe_backends_in_background():
+    """Probe the configured backends without delaying startup"""
+    get_backend_registry().start_probe()
@@ -0,0 +1,333 @@
+"""
+Benchmark of the PDF pipeline over synthetic resumes
+
+Synthetic resumes range from a one-page profile to a very long document
+with dozens of jobs, long descriptions and a large skill list. Each one is
+rendered in memory for every template, font and color, bypassing the PDF
+cache and artifact store and without recording render metrics, so a run
+leaves no trace in production data. Wall time, peak memory and output size
+are recorded. The results are plain JSON so two runs can be compared for
+regressions.
+"""
+from django.utils import timezone
+import sys
+import time
+import random
+import platform
+import tracemalloc
+import statistics
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Number of entries per section for each synthetic resume size
+SIZES = {
+    'small': {'jobs': 2, 'achievements': 2, 'education': 1, 'skills': 8, 'projects': 1, 'certifications': 1, 'paragraphs': 1},
+    'medium': {'jobs': 5, 'achievements': 4, 'education': 2, 'skills': 20, 'projects': 3, 'certifications': 3, 'paragraphs': 2},
+    'large': {'jobs': 15, 'achievements': 6, 'education': 3, 'skills': 60, 'projects': 8, 'certifications': 6, 'paragraphs': 4},
+    'huge': {'jobs': 50, 'achievements': 10, 'education': 5, 'skills': 200, 'projects': 25, 'certifications': 15, 'paragraphs': 8},
+}
+
+WORDS = (
+    'design build scale deliver migrate optimize lead mentor platform service '
+    'pipeline latency throughput customer revenue reliability automation cloud '
+    'analytics infrastructure product team stakeholder roadmap release quality '
+    'security performance database frontend backend api integration workflow'
+).split()
+
+
+def _sentence(rng, words=12):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text.capitalize() + '.'
+
+
+def _paragraph(rng, sentences=4):
+    return ' '.join(_sentence(rng, rng.randint(8, 18)) for _ in range(sentences))
+
+
+def build_synthetic_content(size, seed=0):
+    """
+    Build Resume.content for a synthetic resume
+    
+    The same size and seed always give the same document, so runs are comparable.
+    
+    Args:
+        size: One of the SIZES keys
+        seed: Seed for the random text
+    
+    Returns:
+        dict: Resume content in the structure the resume templates expect
+    """
+    spec = SIZES[size]
+    rng = random.Random(f"{size}-{seed}")
+    
+    return {
+        'personal_info': {
+            'full_name': 'Jordan Example',
+            'email': 'jordan@example.com',
+            'phone': '+1 555 0100',
+            'location': 'Springfield',
+            'linkedin': 'linkedin.com/in/jordan-example',
+            'website': 'jordan.example.com',
+        },
+        'summary': _paragraph(rng, 2 * spec['paragraphs']),
+        'work_experience': [
+            {
+                'job_title': f"Senior Engineer {index + 1}",
+                'company': f"Company {index + 1}",
+                'start_date': f"{2000 + index % 20}-01",
+                'end_date': f"{2001 + index % 20}-12",
+                'current': index == 0,
+                'description': _paragraph(rng, spec['paragraphs']),
+                'achievements': [_sentence(rng, 16) for _ in range(spec['achievements'])],
+            }
+            for index in range(spec['jobs'])
+        ],
+        'education': [
+            {
+                'degree': f"Degree {index + 1}",
+                'institution': f"University {index + 1}",
+                'start_date': f"{1990 + index * 4}-09",
+                'end_date': f"{1994 + index * 4}-06",
+                'description': _paragraph(rng, 2),
+                'achievements': [_sentence(rng) for _ in range(2)],
+            }
+            for index in range(spec['education'])
+        ],
+        'skills': [f"{rng.choice(WORDS).capitalize()} {index + 1}" for index in range(spec['skills'])],
+        'projects': [
+            {
+                'title': f"Project {index + 1}",
+                'url': f"https://example.com/project-{index + 1}",
+                'date': f"{2010 + index % 15}",
+                'description': _paragraph(rng, spec['paragraphs']),
+                'highlights': [_sentence(rng) for _ in range(3)],
+            }
+            for index in range(spec['projects'])
+        ],
+        'certifications': [
+            {
+                'name': f"Certification {index + 1}",
+                'issuer': f"Issuer {index + 1}",
+                'date': f"{2015 + index % 10}",
+                'description': _sentence(rng),
+            }
+            for index in range(spec['certifications'])
+        ],
+        'languages': [
+            {'language': 'English', 'proficiency': 'Native'},
+            {'language': 'Spanish', 'proficiency': 'Professional'},
+        ],
+    }
+
+
+def build_synthetic_resume(size, template=None, seed=0):
+    """
+    Build an unsaved Resume holding synthetic content
+    
+    Args:
+        size: One of the SIZES keys
+        template: ResumeTemplate model instance (or None for the default layout)
+        seed: Seed for the random text
+    
+    Returns:
+        Resume: Unsaved model instance, so benchmarks never touch user data
+    """
+    from .models import Resume
+    
+    return Resume(
+        title=f"Benchmark {size}",
+        slug=f"benchmark-{size}",
+        template=template,
+        content=build_synthetic_content(size, seed),
+        created_at=timezone.now(),
+    )
+
+
+def _max_rss_bytes():
+    """Return the peak resident set size of this process so far (None where unsupported)"""
+    if resource is None:
+        return None
+    
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def measure_render(resume, template, font, color, repeat=3):
+    """
+    Render one combination several times and measure it
+    
+    Renders run in this process rather than a sandbox worker, so the
+    figures describe the renderer and not the hand-off between processes.
+    
+    Args:
+        resume: Resume model instance
+        template: ResumeTemplate model instance (or None)
+        font: Font family to use
+        color: Accent color to use
+        repeat: Number of timed renders (one more render measures memory)
+    
+    Returns:
+        dict: Wall time statistics, peak memory and output size
+    """
+    from .pdf_utils import render_pdf_bytes
+    from .pdf_sandbox import render_inline
+    
+    with render_inline():
+        return _measure_render(render_pdf_bytes, resume, template, font, color, repeat)
+
+
+def _measure_render(render_pdf_bytes, resume, template, font, color, repeat):
+    # Nothing is cached, stored or recorded, so benchmarks never touch user data
+    options = {'use_cache': False, 'source': 'benchmark', 'record_metrics': False}
+    
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pdf_bytes = render_pdf_bytes(resume, template, font, color, **options)
+        timings.append((time.perf_counter() - started) * 1000)
+    
+    # Memory is traced in a separate render since tracing slows everything down
+    tracemalloc.start()
+    try:
+        render_pdf_bytes(resume, template, font, color, **options)
+        peak_python = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    size_bytes = len(pdf_bytes)
+    
+    return {
+        'wall_ms': {
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'max': max(timings),
+        },
+        'peak_python_bytes': peak_python,
+        'max_rss_bytes': _max_rss_bytes(),
+        'size_bytes': size_bytes,
+    }
+
+
+def run_benchmark(sizes=None, templates=None, fonts=None, colors=None, repeat=3, seed=0, progress=None):
+    """
+    Render every size, template, font and color combination
+    
+    Args:
+        sizes: Sizes to render (default: all of SIZES)
+        templates: ResumeTemplate instances (default: the default layout plus every template)
+        fonts: Font families (default: all of FONT_FAMILIES)
+        colors: Accent colors (default: all of ACCENT_COLORS)
+        repeat: Number of timed renders per combination
+        seed: Seed for the synthetic text
+        progress: Optional callable receiving each result as it finishes
+    
+    Returns:
+        dict: Run information and a list of results
+    """
+    from .models import ResumeTemplate
+    from .pdf_utils import FONT_FAMILIES, ACCENT_COLORS, PDF_RENDERER_VERSION
+    from .pdf_renderer import warm_renderer
+    
+    sizes = sizes or list(SIZES)
+    if templates is None:
+        templates = [None] + list(ResumeTemplate.objects.order_by('name'))
+    fonts = fonts or list(FONT_FAMILIES)
+    colors = colors or list(ACCENT_COLORS)
+    
+    # Keep one-off startup work (imports, stylesheet parsing) out of the timings
+    warm_renderer()
+    
+    results = []
+    for size in sizes:
+        for template in templates:
+            resume = build_synthetic_resume(size, template, seed)
+            for font in fonts:
+                for color in colors:
+                    result = {
+                        'size': size,
+                        'template': template.name if template else 'default',
+                        'font': font,
+                        'color': color,
+                    }
+                    try:
+                        result.update(measure_render(resume, template, font, color, repeat))
+                    except Exception as e:
+                        logger.error(f"Benchmark render failed for {size}/{result['template']}/{font}/{color}: {str(e)}")
+                        result['error'] = str(e)
+                    
+                    results.append(result)
+                    if progress:
+                        progress(result)
+    
+    try:
+        import weasyprint
+        weasyprint_version = weasyprint.__version__
+    except Exception:
+        weasyprint_version = None
+    
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'weasyprint': weasyprint_version,
+        'renderer_version': PDF_RENDERER_VERSION,
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def result_key(result):
+    return (result['size'], result['template'], result['font'], result['color'])
+
+
+def compare_runs(baseline, current, threshold=10.0):
+    """
+    Compare two benchmark runs combination by combination
+    
+    Args:
+        baseline: Earlier run, as returned by run_benchmark
+        current: Later run, as returned by run_benchmark
+        threshold: Percentage increase of median wall time, peak memory or
+            size that counts as a regression
+    
+    Returns:
+        list: One dict per combination present in both runs, with the
+        percentage change of each metric and whether it regressed
+    """
+    previous = {result_key(result): result for result in baseline['results'] if 'error' not in result}
+    
+    def change(before, after):
+        if not before:
+            return None
+        return (after - before) / float(before) * 100
+    
+    comparisons = []
+    for result in current['results']:
+        before = previous.get(result_key(result))
+        if before is None or 'error' in result:
+            continue
+        
+        changes = {
+            'wall_ms': change(before['wall_ms']['median'], result['wall_ms']['median']),
+            'peak_python_bytes': change(before['peak_python_bytes'], result['peak_python_bytes']),
+            'size_bytes': change(before['size_bytes'], result['size_bytes']),
+        }
+        comparisons.append({
+            'size': result['size'],
+            'template': result['template'],
+            'font': result['font'],
+            'color': result['color'],
+            'changes': changes,
+            'regressed': any(value is not None and value > threshold for value in changes.values()),
+        })
+    
+    return comparisons
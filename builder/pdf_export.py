@@ -1,14 +1,12 @@
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, Http404
-import os
-import uuid
+from django.http import Http404
+import io
 import logging
-from datetime import datetime
-from django.conf import settings
-from .models import Resume, ResumeAnalytics
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from .models import Resume
+from .analytics import record_event
+from .http_caching import get_content_etag, memoize_on_request, mark_revalidate, ranged_file_response
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,47 +14,98 @@ logger = logging.getLogger(__name__)
 # Import the weasyprint availability checking function
 from .weasyprint_utils import is_weasyprint_available, get_weasyprint_error_response
 
+def can_export(resume, user):
+    """Owners can always export; anyone signed in can export a published resume"""
+    owner = resume.user_profile.user if resume.user_profile else resume.user
+    return owner == user or resume.status == 'published'
+
+
+def _get_export_resume(request, slug):
+    return memoize_on_request(
+        request,
+        ('export', slug),
+        lambda: Resume.objects.select_related('template', 'user_profile__user').filter(slug=slug).first()
+    )
+
+
+def export_pdf_last_modified(request, slug):
+    resume = _get_export_resume(request, slug)
+    if resume is None or not can_export(resume, request.user):
+        return None
+    return resume.updated_at
+
+
+def _no_store(response):
+    """Keep browsers from caching a fallback page in place of the PDF"""
+    patch_cache_control(response, no_store=True)
+    return response
+
+
 @login_required
 def export_pdf_resume(request, slug):
-    """Export resume as PDF with graceful fallback for Windows"""
-    resume = get_object_or_404(Resume, slug=slug)
+    """
+    Export resume as PDF with graceful fallback for Windows
+    
+    Supports conditional GET and single byte ranges, so an interrupted
+    download can be resumed. The ETag is a digest of the PDF bytes: renders
+    of the same content differ (they embed the generation time), so only the
+    bytes tell whether a range can be joined to what the client already has.
+    Validators are only attached to the PDF itself, never to the fallback
+    page, so a browser does not keep showing a cached error once the backend
+    recovers.
+    """
+    resume = _get_export_resume(request, slug)
     
     # If not the owner and resume is not published, deny access
-    if (hasattr(resume, 'user_profile') and resume.user_profile.user != request.user) and resume.status != 'published':
+    if resume is None or not can_export(resume, request.user):
         raise Http404("Resume not found")
     
-    # Log download for analytics
-    if hasattr(resume, 'analytics'):
-        resume.analytics.log_download()
-    else:
-        analytics = ResumeAnalytics.objects.create(resume=resume)
-        analytics.log_download()
-    
     # Check if WeasyPrint is available with all dependencies
     if not is_weasyprint_available():
-        return get_weasyprint_error_response()
+        return _no_store(get_weasyprint_error_response())
     
     try:
         # WeasyPrint is available, proceed with PDF generation
-        from weasyprint import HTML, CSS
-        
-        # Render the resume HTML
-        html_content = render_to_string('resume_templates/export.html', {
-            'resume': resume,
-            'template': resume.template,
-            'export_mode': True,
-        })
-        
-        # Generate PDF
-        html = HTML(string=html_content)
-        result = html.write_pdf()
-        
-        # Create HTTP response with PDF content
-        response = HttpResponse(result, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{resume.slug}.pdf"'
-        return response
+        from .pdf_utils import render_pdf_bytes
         
+        # Render in memory (or reuse the cached document) without touching disk
+        pdf_bytes = render_pdf_bytes(resume, resume.template, source='export_pdf_resume')
+    
     except Exception as e:
         # Log any errors that occur during PDF generation
         logger.error(f"PDF generation error: {str(e)}")
-        return get_weasyprint_error_response()
+        return _no_store(get_weasyprint_error_response())
+    
+    etag = get_content_etag(pdf_bytes)
+    last_modified = export_pdf_last_modified(request, slug)
+    
+    # The browser already has this exact PDF
+    not_modified = get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if not_modified is not None:
+        return not_modified
+    
+    # Stream the PDF content to the client, or just the requested byte range.
+    # A date in If-Range is not passed on: two renders can share one
+    # modification time, so only a matching ETag resumes a download.
+    response = ranged_file_response(
+        request,
+        io.BytesIO(pdf_bytes),
+        len(pdf_bytes),
+        filename=f"{resume.slug}.pdf",
+        etag=etag,
+    )
+    
+    if response.status_code in (200, 206):
+        response['ETag'] = quote_etag(etag)
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+    
+    # Log the download for analytics, once per full download rather than per resumed range
+    if response.status_code == 200:
+        record_event(resume, 'pdf_generated', {'source': 'export_pdf'})
+    
+    return mark_revalidate(response)
@@ -0,0 +1,219 @@
+"""
+Background PDF rendering backed by the PDFRenderJob table
+
+Jobs are recorded in the database and handed to a local process pool, so
+WeasyPrint never runs inside a web request. The `run_pdf_jobs` management
+command drains the same table for deployments that prefer a dedicated worker.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from concurrent.futures.process import BrokenProcessPool
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """
+    Return the shared PDF worker pool, creating it on first use
+    
+    Workers are sandboxed like the ones serving web renders: they render
+    in-process but under the same memory, CPU and wall-clock limits. A pool
+    left broken by a crashed worker is replaced.
+    
+    Returns:
+        ProcessPoolExecutor, or None if local workers are disabled
+    """
+    global _pool
+    
+    from .pdf_sandbox import create_worker_pool
+    
+    workers = getattr(settings, 'PDF_WORKER_PROCESSES', 2)
+    if not workers:
+        return None
+    
+    with _pool_lock:
+        if _pool is None or getattr(_pool, '_broken', False):
+            _pool = create_worker_pool(workers)
+        return _pool
+
+
+def reset_worker_pool(pool):
+    """
+    Kill a broken worker pool so the next get_worker_pool() starts a fresh one
+    
+    Args:
+        pool: The pool that failed; nothing happens if it was already replaced
+    """
+    global _pool
+    
+    from .pdf_sandbox import terminate_worker_pool
+    
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    
+    terminate_worker_pool(pool)
+
+
+def submit_to_worker_pool(fn, *args):
+    """
+    Submit a call to the worker pool, replacing the pool once if it is broken
+    
+    Returns:
+        Future, or None if local workers are disabled
+    """
+    for attempt in range(2):
+        pool = get_worker_pool()
+        if pool is None:
+            return None
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            if attempt:
+                raise
+            logger.error("PDF worker pool is broken, starting a new one")
+            reset_worker_pool(pool)
+
+
+def enqueue_pdf_job(resume, template=None, font='helvetica', color='blue'):
+    """
+    Record a PDF render job and hand it to the local worker pool
+    
+    Args:
+        resume: Resume model instance
+        template: ResumeTemplate model instance (or None to use resume.template)
+        font: Font family to use (default: helvetica)
+        color: Accent color to use (default: blue)
+    
+    Returns:
+        PDFRenderJob: The pending job
+    """
+    from .models import PDFRenderJob
+    
+    job = PDFRenderJob.objects.create(
+        resume=resume,
+        template=template or resume.template,
+        font=font,
+        color=color,
+    )
+    
+    # Only submit once the row is visible to the worker processes
+    transaction.on_commit(lambda: submit_pdf_job(job.id))
+    
+    return job
+
+
+def submit_pdf_job(job_id):
+    """Submit a job to the local pool, leaving it pending if there is none"""
+    try:
+        submit_to_worker_pool(run_pdf_job, job_id)
+    except Exception as e:
+        # The job stays pending and can be picked up by run_pdf_jobs
+        logger.error(f"Could not submit PDF job {job_id}: {str(e)}")
+
+
+def run_pdf_job(job_id):
+    """
+    Render the PDF for a single job
+    
+    Runs inside a worker process. The job is claimed with a conditional
+    update, so a job is never rendered twice when several workers poll.
+    
+    Args:
+        job_id: Primary key of the PDFRenderJob
+    
+    Returns:
+        str: The final job status, or None if the job was already claimed
+    """
+    from .models import PDFRenderJob
+    from .analytics import record_event
+    from .pdf_utils import generate_pdf, handle_pdf_error
+    
+    claimed = PDFRenderJob.objects.filter(id=job_id, status='pending').update(
+        status='running',
+        started_at=timezone.now(),
+    )
+    if not claimed:
+        return None
+    
+    job = PDFRenderJob.objects.select_related('resume', 'template').get(id=job_id)
+    
+    try:
+        pdf_path, filename = generate_pdf(
+            resume=job.resume,
+            template=job.template,
+            font=job.font,
+            color=job.color
+        )
+        job.status = 'done'
+        job.filename = filename
+        
+        # Record analytics
+        record_event(
+            job.resume,
+            'pdf_generated',
+            {
+                'template': job.template.name if job.template else None,
+                'font': job.font,
+                'color': job.color,
+                'job_id': str(job.id)
+            }
+        )
+    except Exception as e:
+        job.status = 'failed'
+        job.error = handle_pdf_error(e)
+    
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'filename', 'error', 'finished_at'])
+    
+    return job.status
+
+
+def requeue_stale_jobs(max_age):
+    """
+    Return jobs stuck in the running state (e.g. after a worker crash) to the queue
+    
+    Args:
+        max_age: Seconds after which a running job is considered abandoned
+    
+    Returns:
+        int: Number of jobs requeued
+    """
+    from .models import PDFRenderJob
+    
+    cutoff = timezone.now() - timezone.timedelta(seconds=max_age)
+    return PDFRenderJob.objects.filter(status='running', started_at__lt=cutoff).update(
+        status='pending',
+        started_at=None,
+    )
+
+
+def process_pending_jobs(limit=None):
+    """
+    Render pending jobs in the current process, oldest first
+    
+    Args:
+        limit: Maximum number of jobs to process (or None for all)
+    
+    Returns:
+        int: Number of jobs processed
+    """
+    from .models import PDFRenderJob
+    
+    job_ids = PDFRenderJob.objects.filter(status='pending').values_list('id', flat=True)
+    if limit:
+        job_ids = job_ids[:limit]
+    
+    processed = 0
+    for job_id in list(job_ids):
+        if run_pdf_job(job_id) is not None:
+            processed += 1
+    
+    return processed
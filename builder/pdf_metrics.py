@@ -0,0 +1,183 @@
+"""
+Per-phase timing and throughput metrics for the PDF pipeline
+
+Every real render (cache hits are not recorded) stores one PDFRenderMetric
+row with the time spent rendering the HTML template, preparing stylesheets,
+laying out pages and serializing the PDF, along with page count, output size
+and the template/font/color labels. Rows are written from whichever process
+rendered, so web workers and background workers report to the same place.
+"""
+from contextlib import contextmanager
+from django.conf import settings
+from django.utils import timezone
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('html', 'css', 'layout', 'write')
+
+# Upper bounds (in milliseconds) of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class RenderTimer:
+    """Collects phase durations and document facts for one render"""
+    
+    def __init__(self):
+        self.timings = {}
+        self.pages = None
+        self.started = time.perf_counter()
+    
+    @contextmanager
+    def phase(self, name):
+        """Time a block of code as the named phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + (time.perf_counter() - started) * 1000
+    
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+    
+    def __getstate__(self):
+        # Sent to a sandbox worker: carry the time measured so far rather
+        # than a clock reading, so waiting for the worker is not counted
+        state = dict(self.__dict__)
+        state['started'] = self.total_ms
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.started = time.perf_counter() - state['started'] / 1000
+
+
+def record_render(timer, source, template, font, color, size_bytes):
+    """
+    Store the metrics of a finished render
+    
+    Failures are logged and swallowed so metrics can never break a download.
+    
+    Args:
+        timer: RenderTimer used for the render
+        source: Entry point that asked for the PDF (e.g. 'generate_pdf')
+        template: ResumeTemplate model instance (or None)
+        font: Font family used
+        color: Accent color used
+        size_bytes: Size of the generated PDF
+    """
+    if not getattr(settings, 'PDF_METRICS_ENABLED', True):
+        return
+    
+    from .models import PDFRenderMetric
+    
+    try:
+        PDFRenderMetric.objects.create(
+            source=source,
+            template=getattr(template, 'name', '') or '',
+            font=font,
+            color=color,
+            html_ms=timer.timings.get('html', 0),
+            css_ms=timer.timings.get('css', 0),
+            layout_ms=timer.timings.get('layout', 0),
+            write_ms=timer.timings.get('write', 0),
+            total_ms=timer.total_ms,
+            pages=timer.pages,
+            size_bytes=size_bytes,
+        )
+    except Exception as e:
+        logger.error(f"Could not record PDF render metrics: {str(e)}")
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a sorted list of numbers"""
+    if not values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(values))))
+    return values[min(rank, len(values)) - 1]
+
+
+def histogram(values):
+    """Count values per latency bucket, with a final overflow bucket"""
+    counts = {f"le_{bound}": 0 for bound in HISTOGRAM_BUCKETS_MS}
+    counts['inf'] = 0
+    for value in values:
+        for bound in HISTOGRAM_BUCKETS_MS:
+            if value <= bound:
+                counts[f"le_{bound}"] += 1
+                break
+        else:
+            counts['inf'] += 1
+    return counts
+
+
+def summarize(metrics, hours=24):
+    """
+    Summarize render metrics
+    
+    Args:
+        metrics: PDFRenderMetric queryset, already filtered to the window
+        hours: Length of the window, used for the throughput figure
+    
+    Returns:
+        dict: Render count, throughput, per-phase percentiles and histograms,
+        and page/size statistics
+    """
+    rows = list(metrics.values_list('html_ms', 'css_ms', 'layout_ms', 'write_ms', 'total_ms', 'pages', 'size_bytes'))
+    
+    phases = {}
+    for index, name in enumerate(PHASES + ('total',)):
+        values = sorted(row[index] for row in rows)
+        phases[name] = {
+            'percentiles': {f"p{pct}": percentile(values, pct) for pct in PERCENTILES},
+            'histogram': histogram(values),
+        }
+    
+    pages = [row[5] for row in rows if row[5] is not None]
+    sizes = [row[6] for row in rows]
+    
+    return {
+        'renders': len(rows),
+        'renders_per_hour': len(rows) / float(hours) if hours else None,
+        'phases_ms': phases,
+        'pages': {
+            'avg': sum(pages) / len(pages) if pages else None,
+            'max': max(pages) if pages else None,
+        },
+        'size_bytes': {
+            'avg': sum(sizes) / len(sizes) if sizes else None,
+            'max': max(sizes) if sizes else None,
+            'total': sum(sizes),
+        },
+    }
+
+
+def get_metrics_window(hours=24, **filters):
+    """Return the metrics recorded in the last `hours` hours, optionally filtered by label"""
+    from .models import PDFRenderMetric
+    
+    since = timezone.now() - timezone.timedelta(hours=hours)
+    return PDFRenderMetric.objects.filter(created_at__gte=since, **filters)
+
+
+def summarize_by_label(hours=24, label=None):
+    """
+    Summarize the recent window, overall or broken down by one label
+    
+    Args:
+        hours: Size of the window
+        label: 'template', 'font', 'color' or 'source' (or None for overall)
+    
+    Returns:
+        dict: Summary, or a mapping of label value to summary
+    """
+    metrics = get_metrics_window(hours)
+    if not label:
+        return summarize(metrics, hours)
+    
+    values = metrics.order_by().values_list(label, flat=True).distinct()
+    return {value: summarize(metrics.filter(**{label: value}), hours) for value in values}
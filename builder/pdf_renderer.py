@@ -0,0 +1,198 @@
+"""
+Long-lived WeasyPrint renderer shared by every PDF render in a process
+
+WeasyPrint is imported once, a single FontConfiguration is kept and the
+precompiled stylesheet bundles are parsed up front, so each render only pays
+for the resume itself. Worker processes build the renderer when they start.
+
+The FontConfiguration and the parsed stylesheets carry fontconfig and Pango
+state that is not safe to use from several threads at once, so CSS parsing
+and rendering are serialized on the renderer lock. Sandbox workers render one
+document at a time anyway; the lock matters when PDF_SANDBOX_ENABLED is off
+or under render_inline(), where request threads share this renderer.
+"""
+from django.conf import settings
+from django.contrib.staticfiles import finders
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+PAGE_CSS = '@page { size: letter; margin: 1cm }'
+BASE_CSS_PATH = 'css/pdf.css'
+TEMPLATE_CSS_DIR = 'css/templates/'
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def find_static_file(path):
+    """
+    Locate a static file on disk
+    
+    Looks in STATIC_ROOT first (collected static files), then asks the
+    staticfiles finders, then falls back to BASE_DIR/static.
+    
+    Args:
+        path: Path relative to the static root (e.g. 'css/pdf.css')
+    
+    Returns:
+        str: Absolute path to the file, or None if it does not exist
+    """
+    if settings.STATIC_ROOT:
+        candidate = os.path.join(settings.STATIC_ROOT, path)
+        if os.path.exists(candidate):
+            return candidate
+    
+    candidate = finders.find(path)
+    if candidate:
+        return candidate
+    
+    candidate = os.path.join(settings.BASE_DIR, 'static', path)
+    if os.path.exists(candidate):
+        return candidate
+    
+    return None
+
+
+def find_template_stylesheets():
+    """
+    Find every template stylesheet under static/css/templates/
+    
+    Returns:
+        dict: Mapping of css_template file name to absolute path
+    """
+    stylesheets = {}
+    
+    for finder in finders.get_finders():
+        for path, storage in finder.list([]):
+            path = path.replace(os.sep, '/')
+            if path.startswith(TEMPLATE_CSS_DIR) and path.endswith('.css'):
+                name = path[len(TEMPLATE_CSS_DIR):]
+                stylesheets.setdefault(name, storage.path(path))
+    
+    if settings.STATIC_ROOT:
+        template_dir = os.path.join(settings.STATIC_ROOT, TEMPLATE_CSS_DIR)
+        if os.path.isdir(template_dir):
+            for name in os.listdir(template_dir):
+                if name.endswith('.css'):
+                    # Collected files take precedence over app sources
+                    stylesheets[name] = os.path.join(template_dir, name)
+    
+    return stylesheets
+
+
+class PDFRenderer:
+    """Holds the WeasyPrint state that can be reused between renders"""
+    
+    def __init__(self):
+        # Import here to avoid circular import
+        from weasyprint import HTML, CSS
+        from weasyprint.fonts import FontConfiguration
+        from .pdf_utils import FONT_FAMILIES, ACCENT_COLORS
+        
+        self.HTML = HTML
+        self.CSS = CSS
+        self.font_config = FontConfiguration()
+        # Guards the shared font configuration as well as bundle_css
+        self.lock = threading.Lock()
+        self.bundle_css = {}
+        
+        # Parse the print bundle of every template stylesheet up front
+        css_templates = [None] + sorted(find_template_stylesheets())
+        for css_template in css_templates:
+            for font in FONT_FAMILIES:
+                for color in ACCENT_COLORS:
+                    self.get_bundle_css(css_template, font, color)
+        
+        logger.info(f"PDF renderer ready with {len(self.bundle_css)} stylesheet bundle(s)")
+    
+    def get_bundle_css(self, css_template, font, color):
+        """Return the parsed print bundle for a template, font and color"""
+        from .style_bundles import get_bundle, get_bundle_name
+        
+        name = get_bundle_name(css_template, font, color)
+        with self.lock:
+            if name not in self.bundle_css:
+                self.bundle_css[name] = self.CSS(string=get_bundle(css_template, font, color), font_config=self.font_config)
+            return self.bundle_css[name]
+    
+    def get_stylesheets(self, template=None, font='helvetica', color='blue', custom_styles=''):
+        """
+        Collect the stylesheets for a render
+        
+        Args:
+            template: ResumeTemplate model instance (or None)
+            font: Font family to use
+            color: Accent color to use
+            custom_styles: Resume specific CSS, parsed on every call
+        
+        Returns:
+            list: WeasyPrint CSS objects in cascade order
+        """
+        css_template = getattr(template, 'css_template', None)
+        stylesheets = [self.get_bundle_css(css_template, font, color)]
+        
+        # Add custom styles from the resume if they exist
+        if custom_styles:
+            with self.lock:
+                stylesheets.append(self.CSS(string=custom_styles, font_config=self.font_config))
+        
+        return stylesheets
+    
+    def write_pdf(self, html_content, stylesheets, timer=None):
+        """
+        Render HTML to PDF bytes
+        
+        Args:
+            html_content: Rendered resume HTML
+            stylesheets: List of CSS objects from get_stylesheets()
+            timer: Optional RenderTimer receiving the layout and write phases
+        
+        Returns:
+            bytes: The PDF document
+        """
+        from .pdf_metrics import RenderTimer
+        
+        timer = timer or RenderTimer()
+        
+        # Waiting for another thread's render is not counted in either phase
+        with self.lock:
+            with timer.phase('layout'):
+                document = self.HTML(string=html_content).render(stylesheets=stylesheets, font_config=self.font_config)
+            
+            with timer.phase('write'):
+                pdf_bytes = document.write_pdf()
+        
+        timer.pages = len(document.pages)
+        
+        return pdf_bytes
+
+
+def get_renderer():
+    """Return the renderer for this process, building it on first use"""
+    global _renderer
+    
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = PDFRenderer()
+    
+    return _renderer
+
+
+def warm_renderer():
+    """Build the renderer ahead of the first job, logging instead of failing"""
+    try:
+        get_renderer()
+    except Exception as e:
+        logger.error(f"Could not pre-warm PDF renderer: {str(e)}")
+
+
+def reset_renderer():
+    """Drop the renderer so the next render re-reads fonts and stylesheets"""
+    global _renderer
+    
+    with _renderer_lock:
+        _renderer = None
@@ -0,0 +1,373 @@
+"""
+Resource-limited worker processes for PDF rendering
+
+Renders run in child processes started with the 'spawn' method, so a
+pathological resume can only hurt a worker, never the web process. Each
+worker caps its address space, every render gets a CPU-time and wall-clock
+budget, and workers are replaced after a fixed number of renders so leaked
+memory is returned to the system. Overruns surface as PDFRenderLimitExceeded
+subclasses that handle_pdf_error turns into user-facing messages.
+"""
+from concurrent.futures import ProcessPoolExecutor, CancelledError, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from django.conf import settings
+import multiprocessing
+import signal
+import sys
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where only the wall-clock limit applies
+    resource = None
+
+# Extra seconds the web process waits beyond the wall-clock limit before it
+# assumes a worker is stuck outside Python and kills it. This also covers
+# starting a replacement for a recycled worker before the render begins
+KILL_GRACE_SECONDS = 15
+
+
+class PDFRenderLimitExceeded(Exception):
+    """Raised when a render overruns one of the sandbox limits"""
+    
+    kind = 'limit'
+
+
+class PDFRenderTimeout(PDFRenderLimitExceeded):
+    kind = 'timeout'
+
+
+class PDFRenderCPULimit(PDFRenderLimitExceeded):
+    kind = 'cpu'
+
+
+class PDFRenderMemoryLimit(PDFRenderLimitExceeded):
+    kind = 'memory'
+
+
+class PDFWorkerCrashed(PDFRenderLimitExceeded):
+    kind = 'crash'
+
+
+class PDFSandboxBusy(PDFRenderLimitExceeded):
+    kind = 'busy'
+
+
+# True inside a sandbox or background worker, where renders run in-process
+_in_worker = False
+
+_inline = threading.local()
+
+_pool = None
+_pool_generation = 0
+_pool_lock = threading.Lock()
+
+# One slot per sandbox worker; a render holds one while it is in a worker
+_slots = None
+
+
+def get_limits():
+    """
+    Read the sandbox limits from the settings
+    
+    Returns:
+        dict: cpu_seconds, wall_seconds, memory_bytes and max_jobs (0 disables a limit)
+    """
+    return {
+        'cpu_seconds': getattr(settings, 'PDF_SANDBOX_CPU_SECONDS', 20),
+        'wall_seconds': getattr(settings, 'PDF_SANDBOX_WALL_SECONDS', 45),
+        'memory_bytes': getattr(settings, 'PDF_SANDBOX_MEMORY_BYTES', 2 * 1024 * 1024 * 1024),
+        'max_jobs': getattr(settings, 'PDF_SANDBOX_MAX_JOBS', 50),
+    }
+
+
+def renders_in_process():
+    """Check whether renders should run in the current process rather than a sandbox worker"""
+    return _in_worker or getattr(_inline, 'active', False) or not getattr(settings, 'PDF_SANDBOX_ENABLED', True)
+
+
+@contextmanager
+def render_inline():
+    """Render in the current thread, e.g. so a benchmark measures the renderer itself"""
+    previous = getattr(_inline, 'active', False)
+    _inline.active = True
+    try:
+        yield
+    finally:
+        _inline.active = previous
+
+
+def _init_limited_worker(memory_bytes, warm):
+    """Set up a freshly spawned worker: Django, the memory cap and the shared renderer"""
+    global _in_worker
+    
+    import django
+    django.setup()
+    
+    _in_worker = True
+    
+    if resource is not None and memory_bytes:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            memory_bytes = min(memory_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+    
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+    
+    if warm:
+        from .pdf_renderer import warm_renderer
+        warm_renderer()
+
+
+def _raise_cpu_limit(signum, frame):
+    raise PDFRenderCPULimit("PDF render exceeded its CPU time limit")
+
+
+def _raise_timeout(signum, frame):
+    raise PDFRenderTimeout("PDF render exceeded its time limit")
+
+
+def create_worker_pool(workers, warm=True):
+    """
+    Create a pool of spawned, resource-limited workers
+    
+    Args:
+        workers: Number of worker processes
+        warm: Import WeasyPrint and parse the stylesheets when a worker starts
+    
+    Returns:
+        ProcessPoolExecutor
+    """
+    limits = get_limits()
+    options = {
+        'max_workers': workers,
+        'mp_context': multiprocessing.get_context('spawn'),
+        'initializer': _init_limited_worker,
+        'initargs': (limits['memory_bytes'], warm),
+    }
+    
+    # Recycling workers needs Python 3.11
+    if limits['max_jobs'] and sys.version_info >= (3, 11):
+        options['max_tasks_per_child'] = limits['max_jobs']
+    
+    return ProcessPoolExecutor(**options)
+
+
+@contextmanager
+def render_limits():
+    """
+    Apply the per-render CPU and wall-clock budget inside a worker
+    
+    Raises:
+        PDFRenderCPULimit, PDFRenderTimeout, PDFRenderMemoryLimit: On overruns
+    """
+    if not _in_worker:
+        yield
+        return
+    
+    limits = get_limits()
+    previous_cpu = None
+    
+    # RLIMIT_CPU counts the whole life of the process, so the budget is
+    # granted on top of the CPU time already used by earlier renders
+    if resource is not None and limits['cpu_seconds']:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        previous_cpu = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(usage.ru_utime + usage.ru_stime) + limits['cpu_seconds']
+        hard = previous_cpu[1]
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    
+    if hasattr(signal, 'alarm') and limits['wall_seconds']:
+        signal.alarm(limits['wall_seconds'])
+    
+    try:
+        yield
+    except MemoryError:
+        raise PDFRenderMemoryLimit("PDF render exceeded its memory limit")
+    finally:
+        if hasattr(signal, 'alarm'):
+            signal.alarm(0)
+        if previous_cpu is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, previous_cpu)
+
+
+def get_sandbox_pool():
+    """Return the sandbox pool of this process and its generation, creating it on first use"""
+    global _pool
+    
+    with _pool_lock:
+        if _pool is None or getattr(_pool, '_broken', False):
+            _pool = create_worker_pool(getattr(settings, 'PDF_SANDBOX_PROCESSES', 2))
+        return _pool, _pool_generation
+
+
+def get_sandbox_slots():
+    """Return the semaphore limiting renders in flight to the number of sandbox workers"""
+    global _slots
+    
+    with _pool_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(max(getattr(settings, 'PDF_SANDBOX_PROCESSES', 2), 1))
+        return _slots
+
+
+def terminate_worker_pool(pool):
+    """Shut a worker pool down and kill its processes, even ones stuck in C code"""
+    # A worker stuck inside C code never returns, so shutting down is not
+    # enough; the processes are terminated directly
+    processes = list((getattr(pool, '_processes', None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        try:
+            process.terminate()
+        except Exception:
+            pass
+
+
+def reset_sandbox_pool(generation=None):
+    """
+    Kill the sandbox workers and start over with a fresh pool on next use
+    
+    Args:
+        generation: Only reset if the pool is still this generation, so
+            several callers seeing the same failure reset it once
+    """
+    global _pool, _pool_generation
+    
+    with _pool_lock:
+        if _pool is None or (generation is not None and generation != _pool_generation):
+            return
+        
+        pool = _pool
+        _pool = None
+        _pool_generation += 1
+    
+    terminate_worker_pool(pool)
+
+
+def _render_in_worker(resume, template, font, color, source, resume_body, record_metrics=True, timer=None):
+    from .pdf_utils import _render_pdf
+    
+    with render_limits():
+        return _render_pdf(resume, template, font, color, source, resume_body, record_metrics, timer)
+
+
+def _probe_in_worker(backend):
+    backend.probe()
+
+
+def probe_in_sandbox(backend):
+    """
+    Run a PDF backend's probe in a sandbox worker
+    
+    The worker imports the rendering libraries, so the web process never has to.
+    
+    Args:
+        backend: PDFBackend instance to probe
+    
+    Raises:
+        PDFRenderLimitExceeded: If the probe hung or killed its worker, or no
+            worker became free within PDF_SANDBOX_QUEUE_TIMEOUT
+        Exception: Whatever the backend's probe raised
+    """
+    limits = get_limits()
+    timeout = limits['wall_seconds'] + KILL_GRACE_SECONDS if limits['wall_seconds'] else None
+    
+    slots = get_sandbox_slots()
+    if not slots.acquire(timeout=getattr(settings, 'PDF_SANDBOX_QUEUE_TIMEOUT', 30) or None):
+        raise PDFSandboxBusy("Every PDF worker is busy")
+    
+    try:
+        pool, generation = get_sandbox_pool()
+        try:
+            return pool.submit(_probe_in_worker, backend).result(timeout=timeout)
+        except FutureTimeoutError:
+            reset_sandbox_pool(generation)
+            raise PDFRenderTimeout("PDF backend probe exceeded its time limit")
+        except (BrokenProcessPool, CancelledError):
+            reset_sandbox_pool(generation)
+            raise PDFWorkerCrashed("The PDF worker stopped unexpectedly while probing the backend")
+    finally:
+        slots.release()
+
+
+def render_in_sandbox(resume, template=None, font='helvetica', color='blue', source='generate_pdf', resume_body=None,
+                      record_metrics=True, timer=None):
+    """
+    Render a resume to PDF bytes in a sandbox worker
+    
+    Args:
+        resume: Resume model instance
+        template: ResumeTemplate model instance (or None)
+        font: Font family to use
+        color: Accent color to use
+        source: Label of the calling entry point for the render metrics
+        resume_body: Body HTML already rendered by the caller (or None)
+        record_metrics: Store a PDFRenderMetric for the render
+        timer: RenderTimer holding phases already measured here (or None)
+    
+    Returns:
+        bytes: The PDF document
+    
+    Raises:
+        PDFRenderLimitExceeded: If the render overran a limit, killed its
+            worker, or no worker became free within PDF_SANDBOX_QUEUE_TIMEOUT
+    """
+    from .pdf_backends import PDFBackendUnavailable, get_backend_registry
+    
+    limits = get_limits()
+    timeout = limits['wall_seconds'] + KILL_GRACE_SECONDS if limits['wall_seconds'] else None
+    
+    # Wait for a free worker before submitting, so the timeout below only
+    # covers the render itself and never time spent queued behind others
+    slots = get_sandbox_slots()
+    if not slots.acquire(timeout=getattr(settings, 'PDF_SANDBOX_QUEUE_TIMEOUT', 30) or None):
+        raise PDFSandboxBusy("Every PDF worker is busy")
+    
+    # Workers keep their own circuit breakers, so failures of the sandbox
+    # itself are reported to this process's registry here
+    registry = get_backend_registry()
+    try:
+        for attempt in range(2):
+            pool, generation = get_sandbox_pool()
+            try:
+                future = pool.submit(
+                    _render_in_worker, resume, template, font, color, source, resume_body, record_metrics, timer
+                )
+                pdf_bytes = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                logger.error(f"PDF worker for resume {resume.slug} stopped responding, restarting the sandbox")
+                reset_sandbox_pool(generation)
+                registry.report_failure()
+                raise PDFRenderTimeout("PDF render exceeded its time limit")
+            except (BrokenProcessPool, CancelledError) as e:
+                # The pool was reset under us by another render's timeout: try once more
+                if attempt == 0 and generation != _pool_generation:
+                    continue
+                logger.error(f"PDF worker crashed while rendering resume {resume.slug}: {str(e)}")
+                reset_sandbox_pool(generation)
+                registry.report_failure()
+                raise PDFWorkerCrashed("The PDF worker stopped unexpectedly, possibly after running out of memory")
+            except RuntimeError:
+                # Submitting to a pool that another render has just shut down
+                if attempt == 0 and generation != _pool_generation:
+                    continue
+                raise
+            except (PDFRenderTimeout, PDFBackendUnavailable):
+                registry.report_failure()
+                raise
+            
+            registry.report_success()
+            return pdf_bytes
+    finally:
+        slots.release()
@@ -0,0 +1,200 @@
+"""
+Content-addressed storage for generated PDF files
+
+Files are named after the sha256 of their bytes and sharded into two levels
+of hash-prefixed directories, so identical documents are stored once and no
+directory grows without bound. The modification time of a file doubles as
+its last access time: it is refreshed whenever a render reuses the file and
+whenever the file is downloaded through the download_pdf view (files must
+not be served straight from MEDIA_URL, or they would age as if unused).
+Once the store exceeds its byte quota the least recently used files are
+evicted.
+
+Deduplication only hits when the exact same bytes are stored again. Every
+render embeds its generation time, so two renders of an unchanged resume
+rarely match; most reuse comes from the artifact key in the PDF cache.
+"""
+from django.conf import settings
+import os
+import re
+import time
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Storage names handed out by PDFArtifactStore.get_name
+NAME_RE = re.compile(r'^([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{60})\.pdf$')
+
+
+class PDFArtifactStore:
+    """Deduplicating PDF store with a byte quota and LRU eviction"""
+    
+    # Evict down to this fraction of the quota so eviction does not run on every save
+    LOW_WATERMARK = 0.9
+    
+    # Re-measure the store at least this often, since other processes write to it too
+    RESCAN_INTERVAL = 300
+    
+    def __init__(self, root=None, quota=None):
+        self.root = str(root or getattr(settings, 'PDF_STORE_ROOT', None) or os.path.join(settings.MEDIA_ROOT, 'pdfs'))
+        self.quota = quota if quota is not None else getattr(settings, 'PDF_STORE_QUOTA_BYTES', 512 * 1024 * 1024)
+        self.lock = threading.Lock()
+        self._size = None
+        self._scanned_at = 0
+    
+    def get_name(self, digest):
+        """Return the storage name (relative to the root) for a content digest"""
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.pdf"
+    
+    def get_path(self, name):
+        """Return the absolute path for a storage name"""
+        return os.path.join(self.root, *name.split('/'))
+    
+    def exists(self, name):
+        """Check whether a stored file is still present, marking it as used"""
+        path = self.get_path(name)
+        try:
+            os.utime(path, None)
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def open(self, name):
+        """
+        Open a stored file for download, marking it as used
+        
+        Args:
+            name: Storage name, as returned by save()
+        
+        Returns:
+            tuple: (file object, size in bytes), or None if the name is not a
+            valid storage name or the file has been evicted
+        """
+        if not NAME_RE.match(name):
+            return None
+        
+        path = self.get_path(name)
+        try:
+            os.utime(path, None)
+            pdf_file = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        return pdf_file, os.fstat(pdf_file.fileno()).st_size
+    
+    def save(self, pdf_bytes):
+        """
+        Store a PDF, reusing an existing copy of identical content
+        
+        Args:
+            pdf_bytes: The PDF document
+        
+        Returns:
+            str: Storage name of the file, relative to the store root
+        """
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        name = self.get_name(digest)
+        
+        if self.exists(name):
+            return name
+        
+        path = self.get_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        # Write to a temporary file first so readers never see a partial PDF
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as pdf_file:
+            pdf_file.write(pdf_bytes)
+        os.replace(tmp_path, path)
+        
+        with self.lock:
+            if self._size is not None:
+                self._size += len(pdf_bytes)
+        
+        if self.quota and self.get_size() > self.quota:
+            self.evict(keep=path)
+        
+        return name
+    
+    def scan(self):
+        """
+        List every file in the store
+        
+        Returns:
+            list: (path, size, last_access) tuples
+        """
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith('.pdf'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+    
+    def get_size(self):
+        """Return the total size of the store, re-measuring it when stale"""
+        with self.lock:
+            if self._size is None or time.time() - self._scanned_at > self.RESCAN_INTERVAL:
+                self._size = sum(size for path, size, last_access in self.scan())
+                self._scanned_at = time.time()
+            return self._size
+    
+    def evict(self, target=None, keep=None):
+        """
+        Delete least recently used files until the store fits the target size
+        
+        Args:
+            target: Size in bytes to shrink to (default: quota * LOW_WATERMARK)
+            keep: Path of a file that must survive, e.g. the one just saved
+        
+        Returns:
+            tuple: (files removed, bytes freed)
+        """
+        if target is None:
+            target = int(self.quota * self.LOW_WATERMARK)
+        
+        files = self.scan()
+        total = sum(size for path, size, last_access in files)
+        removed = freed = 0
+        
+        for path, size, last_access in sorted(files, key=lambda f: f[2]):
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            freed += size
+            removed += 1
+        
+        with self.lock:
+            self._size = total
+            self._scanned_at = time.time()
+        
+        if removed:
+            logger.info(f"Evicted {removed} PDF file(s), freed {freed} bytes")
+        
+        return removed, freed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_pdf_store():
+    """Return the PDF store for this process"""
+    global _store
+    
+    with _store_lock:
+        if _store is None:
+            _store = PDFArtifactStore()
+        return _store
@@ -2,53 +2,142 @@
 PDF utility functions for resume generation
 """
 from django.template.loader import render_to_string
-from django.http import HttpResponse
 from django.conf import settings
+from django.core.cache import caches
 from django.utils import timezone
-import os
-import uuid
+from django.urls import reverse
+import json
+import hashlib
 import logging
-from datetime import datetime
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def generate_pdf(resume, template=None, font='helvetica', color='blue'):
+# Font families and accent colors offered in the resume editor
+FONT_FAMILIES = {
+    'helvetica': "'Helvetica Neue', Arial, sans-serif",
+    'georgia': "Georgia, serif",
+    'calibri': "Calibri, 'Segoe UI', sans-serif",
+    'arial': "Arial, sans-serif",
+    'times': "'Times New Roman', Times, serif",
+}
+
+ACCENT_COLORS = {
+    'blue': '#3498db',
+    'green': '#2ecc71',
+    'red': '#e74c3c',
+    'purple': '#9b59b6',
+    'gray': '#34495e',
+}
+
+# Bump this whenever a change to the rendering pipeline (templates, base CSS,
+# WeasyPrint options) alters the generated PDF, so stale cache entries are ignored
+PDF_RENDERER_VERSION = '1'
+
+
+def get_pdf_cache():
+    """Return the cache backend used to store rendered PDF documents"""
+    return caches[getattr(settings, 'PDF_CACHE_ALIAS', 'default')]
+
+
+def get_pdf_cache_key(resume, template=None, font='helvetica', color='blue'):
     """
-    Generate a PDF from a resume using the specified template and styling
+    Build a content-addressed cache key for a rendered resume PDF
+    
+    The key is a digest of everything that ends up in the document, so any
+    edit to the resume, its template or its styling produces a new key.
+    
+    Args:
+        resume: Resume model instance
+        template: ResumeTemplate model instance (or None to use resume.template)
+        font: Font family to use
+        color: Accent color to use
+        
+    Returns:
+        str: Cache key for the rendered PDF
+    """
+    if template is None:
+        template = resume.template
+    
+    payload = json.dumps({
+        'renderer': PDF_RENDERER_VERSION,
+        'title': resume.title,
+        'content': resume.content,
+        'custom_styles': resume.custom_styles,
+        'is_public': resume.is_public,
+        'share_token': resume.share_token,
+        'template': getattr(template, 'name', None),
+        'html_template': getattr(template, 'html_template', None),
+        'css_template': getattr(template, 'css_template', None),
+        'font': font,
+        'color': color,
+    }, sort_keys=True, default=str)
+    
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return f"resume-pdf:{digest}"
+
+
+def render_pdf_bytes(resume, template=None, font='helvetica', color='blue', use_cache=True, source='generate_pdf',
+                     record_metrics=True):
+    """
+    Render a resume to PDF bytes, reusing a cached document when possible
     
     Args:
         resume: Resume model instance
         template: ResumeTemplate model instance (or None to use resume.template)
         font: Font family to use (default: helvetica)
         color: Accent color to use (default: blue)
+        use_cache: Look up and store the document in the PDF cache
+        source: Label of the calling entry point for the render metrics
+        record_metrics: Store a PDFRenderMetric for the render
         
     Returns:
-        tuple: (pdf_path, filename)
-        
-    Raises:
-        Exception: If PDF generation fails
+        bytes: The PDF document
     """
-    try:
-        # Import here to avoid circular import
-        from weasyprint import HTML, CSS
-        from weasyprint.fonts import FontConfiguration
-        
-        # Use the resume's template if none provided
-        if template is None:
-            template = resume.template
-            
-        # Ensure the PDF directory exists
-        pdf_dir = os.path.join(settings.MEDIA_ROOT, 'pdfs')
-        os.makedirs(pdf_dir, exist_ok=True)
-        
-        # Generate a unique filename
-        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-        unique_id = str(uuid.uuid4())[:8]
-        filename = f"resume-{resume.slug}-{timestamp}-{unique_id}.pdf"
-        pdf_path = os.path.join(pdf_dir, filename)
-        
-        # Render the resume HTML
+    # Use the resume's template if none provided
+    if template is None:
+        template = resume.template
+    
+    cache_key = get_pdf_cache_key(resume, template, font, color)
+    if use_cache:
+        pdf_bytes = get_pdf_cache().get(cache_key)
+        if pdf_bytes is not None:
+            logger.debug(f"PDF cache hit for resume {resume.slug}")
+            return pdf_bytes
+    
+    from .pdf_metrics import RenderTimer
+    from .pdf_sandbox import renders_in_process, render_in_sandbox, render_limits
+    from .render_cache import render_resume_body
+    
+    timer = RenderTimer()
+    
+    # The body HTML is shared with the preview, so it is usually rendered
+    # already; when it is not, rendering it counts towards the html phase
+    with timer.phase('html'):
+        resume_body = render_resume_body(resume, template, use_cache=use_cache)
+    
+    if renders_in_process():
+        with render_limits():
+            pdf_bytes = _render_pdf(resume, template, font, color, source, resume_body, record_metrics, timer)
+    else:
+        # Keep WeasyPrint (and whatever a resume does to it) out of the web process
+        pdf_bytes = render_in_sandbox(resume, template, font, color, source, resume_body, record_metrics, timer)
+    
+    if use_cache:
+        get_pdf_cache().set(cache_key, pdf_bytes, getattr(settings, 'PDF_CACHE_TIMEOUT', 60 * 60 * 24))
+    
+    return pdf_bytes
+
+
+def _render_pdf(resume, template, font, color, source, resume_body=None, record_metrics=True, timer=None):
+    """Render a resume to PDF bytes in the current process and record its metrics"""
+    from .pdf_backends import get_backend_registry
+    from .pdf_metrics import RenderTimer, record_render
+    
+    timer = timer or RenderTimer()
+    
+    # Render the resume HTML
+    with timer.phase('html'):
         html_content = render_to_string('resume_templates/export.html', {
             'resume': resume,
             'template': template,
@@ -56,113 +145,71 @@ def generate_pdf(resume, template=None, font='helvetica', color='blue'):
             'color': color,
             'export_mode': True,
             'generation_date': timezone.now(),
+            'resume_body': resume_body,
         })
-        
-        # Set up font configuration
-        font_config = FontConfiguration()
-        
-        # Get CSS files
-        base_css = os.path.join(settings.STATIC_ROOT, 'css/pdf.css')
-        if not os.path.exists(base_css):
-            # Fallback to using the relative path
-            base_css = os.path.join(settings.BASE_DIR, 'static/css/pdf.css')
-            
-        # Template CSS
-        template_css = None
-        if template and hasattr(template, 'css_template') and template.css_template:
-            template_css = os.path.join(settings.STATIC_ROOT, f'css/templates/{template.css_template}')
-            if not os.path.exists(template_css):
-                template_css = os.path.join(settings.BASE_DIR, f'static/css/templates/{template.css_template}')
-                if not os.path.exists(template_css):
-                    template_css = None
-        
-        # Collect stylesheets
-        stylesheets = [
-            CSS(string='@page { size: letter; margin: 1cm }', font_config=font_config),
-            CSS(filename=base_css, font_config=font_config),
-        ]
-        
-        # Add template CSS if it exists
-        if template_css and os.path.exists(template_css):
-            stylesheets.append(CSS(filename=template_css, font_config=font_config))
-        
-        # Additional styles based on font and color
-        stylesheets.append(CSS(string=get_font_css(font), font_config=font_config))
-        stylesheets.append(CSS(string=get_color_css(color), font_config=font_config))
-        
-        # Add custom styles from the resume if they exist
-        if resume.custom_styles:
-            stylesheets.append(CSS(string=resume.custom_styles, font_config=font_config))
-        
-        # Generate PDF
-        html = HTML(string=html_content)
-        html.write_pdf(pdf_path, stylesheets=stylesheets, font_config=font_config)
-        
-        logger.info(f"Generated PDF for resume {resume.slug}: {filename}")
-        
-        return pdf_path, filename
-        
-    except Exception as e:
-        logger.error(f"PDF generation failed for resume {resume.slug}: {str(e)}")
-        raise e
+    
+    # Generate PDF with the first healthy backend
+    pdf_bytes = get_backend_registry().render(html_content, template, font, color, resume.custom_styles, timer=timer)
+    
+    if record_metrics:
+        record_render(timer, source, template, font, color, len(pdf_bytes))
+    
+    return pdf_bytes
 
 
-def generate_pdf_response(resume, template=None, font='helvetica', color='blue', download=True):
+def generate_pdf(resume, template=None, font='helvetica', color='blue', use_cache=True, source='generate_pdf'):
     """
-    Generate a PDF response from a resume
+    Generate a PDF from a resume using the specified template and styling
+    
+    The file is kept in the PDF artifact store, which names files after their
+    content, so identical documents share one file. The PDF cache key of the
+    last render is remembered, letting an unchanged resume skip rendering.
     
     Args:
         resume: Resume model instance
         template: ResumeTemplate model instance (or None to use resume.template)
         font: Font family to use (default: helvetica)
         color: Accent color to use (default: blue)
-        download: Boolean indicating if this is a download (attachment) or preview
-    
+        use_cache: Look up and store the document in the PDF cache
+        source: Label of the calling entry point for the render metrics
+        
     Returns:
-        HttpResponse with PDF content
+        tuple: (pdf_path, filename) where filename is relative to MEDIA_ROOT/pdfs
+        
+    Raises:
+        Exception: If PDF generation fails
     """
+    from .pdf_storage import get_pdf_store
+    
     try:
-        # Check if WeasyPrint is available
-        from .weasyprint_utils import is_weasyprint_available, get_weasyprint_error_response
+        # Use the resume's template if none provided
+        if template is None:
+            template = resume.template
         
-        if not is_weasyprint_available():
-            return get_weasyprint_error_response()
+        store = get_pdf_store()
+        cache_key = get_pdf_cache_key(resume, template, font, color)
+        artifact_key = f"resume-pdf-file:{cache_key.split(':', 1)[1]}"
         
-        # Generate the PDF file
-        pdf_path, filename = generate_pdf(resume, template, font, color)
+        # Reuse the stored file of an earlier identical render
+        if use_cache:
+            filename = get_pdf_cache().get(artifact_key)
+            if filename and store.exists(filename):
+                logger.debug(f"Reusing PDF for resume {resume.slug}: {filename}")
+                return store.get_path(filename), filename
         
-        # Create the HTTP response
-        with open(pdf_path, 'rb') as pdf_file:
-            response = HttpResponse(pdf_file.read(), content_type='application/pdf')
+        pdf_bytes = render_pdf_bytes(resume, template, font, color, use_cache=use_cache, source=source)
+        filename = store.save(pdf_bytes)
         
-        # Set filename and disposition
-        if download:
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        else:
-            response['Content-Disposition'] = f'inline; filename="{filename}"'
+        if use_cache:
+            get_pdf_cache().set(artifact_key, filename, getattr(settings, 'PDF_CACHE_TIMEOUT', 60 * 60 * 24))
         
-        # Track the download/view for analytics if applicable
-        from .models import ResumeAnalytics
-        ResumeAnalytics.objects.create(
-            resume=resume,
-            action='pdf_generated',
-            metadata={
-                'font': font,
-                'color': color,
-                'download': download,
-            }
-        )
+        logger.info(f"Generated PDF for resume {resume.slug}: {filename}")
         
-        return response
+        return store.get_path(filename), filename
         
     except Exception as e:
-        # Handle errors
-        error_message = handle_pdf_error(e)
-        logger.error(f"PDF response generation error: {error_message}")
-        
-        # Import WeasyPrint error handler
-        from .weasyprint_utils import get_weasyprint_error_response
-        return get_weasyprint_error_response()
+        logger.error(f"PDF generation failed for resume {resume.slug}: {str(e)}")
+        raise e
 
 
 def handle_pdf_error(error):
@@ -175,9 +222,25 @@ def handle_pdf_error(error):
     Returns:
         str: User-friendly error message
     """
+    from .pdf_backends import PDFBackendUnavailable
+    from .pdf_sandbox import PDFRenderLimitExceeded
+    
     error_str = str(error)
     
-    if "Permission denied" in error_str:
+    if isinstance(error, PDFBackendUnavailable):
+        return "PDF generation is temporarily unavailable. Please use the printable version or try again in a few minutes."
+    
+    elif isinstance(error, PDFRenderLimitExceeded):
+        logger.warning(f"PDF render stopped by the sandbox ({error.kind}): {error_str}")
+        if error.kind == 'memory':
+            return "Your resume needed too much memory to render as a PDF. Please shorten long sections or custom styles and try again."
+        elif error.kind == 'crash':
+            return "The PDF renderer stopped unexpectedly. Please try again, or use the printable version."
+        elif error.kind == 'busy':
+            return "The PDF service is busy right now. Please try again in a moment, or use the printable version."
+        return "Your resume took too long to render as a PDF. Please shorten long sections or custom styles and try again."
+    
+    elif "Permission denied" in error_str:
         return "Could not save the PDF file due to permission issues. Please try again later."
     
     elif "Cannot connect to the host" in error_str:
@@ -201,58 +264,45 @@ def handle_pdf_error(error):
         return "An unexpected error occurred while generating your PDF. Please try again later."
 
 
-def get_font_css(font):
+def get_font_css(font, scope=None):
     """
     Get CSS for the specified font
     
     Args:
         font: Font family name
+        scope: Selector to apply the font to (default: body)
         
     Returns:
         str: CSS rules for the font
     """
-    font_map = {
-        'helvetica': "'Helvetica Neue', Arial, sans-serif",
-        'georgia': "Georgia, serif",
-        'calibri': "Calibri, 'Segoe UI', sans-serif",
-        'arial': "Arial, sans-serif",
-        'times': "'Times New Roman', Times, serif",
-    }
-    
-    font_family = font_map.get(font, font_map['helvetica'])
+    font_family = FONT_FAMILIES.get(font, FONT_FAMILIES['helvetica'])
     
     return f"""
-    body {{
+    {scope or 'body'} {{
         font-family: {font_family};
     }}
     """
 
 
-def get_color_css(color):
+def get_color_css(color, scope=None):
     """
     Get CSS for the specified accent color
     
     Args:
         color: Color name
+        scope: Selector to prefix every rule with (default: none)
         
     Returns:
         str: CSS rules for the color
     """
-    color_map = {
-        'blue': '#3498db',
-        'green': '#2ecc71',
-        'red': '#e74c3c',
-        'purple': '#9b59b6',
-        'gray': '#34495e',
-    }
-    
-    accent_color = color_map.get(color, color_map['blue'])
+    accent_color = ACCENT_COLORS.get(color, ACCENT_COLORS['blue'])
+    prefix = f"{scope} " if scope else ''
     
     return f"""
-    h2, .section-title {{
+    {prefix}h2, {prefix}.section-title {{
         color: {accent_color};
     }}
-    .skill-item {{
+    {prefix}.skill-item {{
         background-color: {accent_color}20;
         border-left: 3px solid {accent_color};
     }}
@@ -269,4 +319,4 @@ def get_pdf_download_url(filename):
     Returns:
         str: URL to download the PDF
     """
-    return f"{settings.MEDIA_URL}pdfs/{filename}"
+    return reverse('download_pdf', args=[filename])
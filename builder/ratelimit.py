@@ -0,0 +1,143 @@
+"""
+Token-bucket rate limiting for the public resume endpoints
+
+Every client IP and every share token gets a bucket per scope that holds up
+to N tokens and refills continuously at N per period, so the limit applies
+to any sliding window of that length while still allowing short bursts.
+Buckets live in a Django cache (RATE_LIMIT_CACHE_ALIAS), which makes the
+limit shared between processes when that cache is. Limited requests are
+answered with 429 before the view runs, i.e. without touching the database.
+
+The read-modify-write of a bucket is not atomic, so concurrent requests may
+occasionally get through a few more tokens than configured; that is fine for
+flood protection.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from functools import wraps
+import hashlib
+import json
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a rate such as '60/m' or '1000/h'
+    
+    Args:
+        rate: 'N/period' with period one of s, m, h, d
+    
+    Returns:
+        tuple: (capacity, period in seconds)
+    
+    Raises:
+        ValueError: If the rate is malformed
+    """
+    try:
+        count, period = rate.split('/')
+        return int(count), PERIODS[period.strip().lower()[0]]
+    except (AttributeError, ValueError, KeyError, IndexError):
+        raise ValueError(f"Invalid rate '{rate}', expected e.g. '60/m'")
+
+
+def take_token(scope, kind, value, rate, now=None):
+    """
+    Take one token from the bucket of a client
+    
+    Args:
+        scope: Name of the limited endpoint group (a RATE_LIMITS key)
+        kind: What `value` identifies, e.g. 'ip' or 'token'
+        value: The client IP or share token
+        rate: Allowed rate, e.g. '60/m'
+        now: Current time in seconds (default: time.time())
+    
+    Returns:
+        float: 0 if the request is allowed, otherwise seconds until a token is free
+    """
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    now = time.time() if now is None else now
+    
+    cache = caches[getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')]
+    key = f"ratelimit:{scope}:{kind}:{hashlib.sha1(str(value).encode('utf-8')).hexdigest()[:16]}"
+    
+    try:
+        tokens, stamp = cache.get(key) or (capacity, now)
+    except Exception as e:
+        # Never turn a cache outage into an outage of the public pages
+        logger.warning(f"Rate limit cache unavailable: {str(e)}")
+        return 0
+    
+    tokens = min(capacity, tokens + (now - stamp) * refill)
+    if tokens < 1:
+        return (1 - tokens) / refill
+    
+    try:
+        # A bucket left alone for one period is full again, so it can expire
+        cache.set(key, (tokens - 1, now), timeout=period)
+    except Exception as e:
+        logger.warning(f"Rate limit cache unavailable: {str(e)}")
+    return 0
+
+
+def get_share_token(request, *args, **kwargs):
+    """Read the share token from the URL or from the JSON body of a beacon"""
+    if 'share_token' in kwargs:
+        return kwargs['share_token']
+    try:
+        data = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data.get('share_token') if isinstance(data, dict) else None
+
+
+def rate_limit(scope):
+    """
+    Decorator limiting a view per client IP and per share token
+    
+    The limits are read from RATE_LIMITS[scope], e.g.
+    {'ip': '60/m', 'token': '600/m'}; a missing scope or kind is unlimited.
+    
+    Args:
+        scope: Name of the endpoint group in RATE_LIMITS
+    
+    Returns:
+        function: The decorator
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            limits = getattr(settings, 'RATE_LIMITS', {}).get(scope) or {}
+            
+            # Local import: views_resume imports this module
+            from .views_resume import get_client_ip
+            
+            clients = (
+                ('ip', lambda: get_client_ip(request)),
+                ('token', lambda: get_share_token(request, *args, **kwargs)),
+            )
+            for kind, get_value in clients:
+                if not limits.get(kind):
+                    continue
+                value = get_value()
+                if not value:
+                    continue
+                
+                retry_after = take_token(scope, kind, value, limits[kind])
+                if retry_after:
+                    response = HttpResponse('Too many requests', status=429, content_type='text/plain')
+                    response['Retry-After'] = str(math.ceil(retry_after))
+                    return response
+            
+            return view_func(request, *args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
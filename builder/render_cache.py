@@ -0,0 +1,157 @@
+"""
+Cache of rendered resume HTML, shared by the preview and the PDF export
+
+The body of a resume (the template partial filled with resume.content)
+does not depend on the font or color, so it is cached once per content
+version and template and reused by both the preview and export.html. The
+full preview fragment, which adds the scoped stylesheet, is cached per
+font and color on top of that. Resume.save() bumps content_version, so a
+saved edit moves every key along and stale entries simply expire.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_html_cache():
+    """Return the cache backend used to store rendered resume HTML"""
+    return caches[getattr(settings, 'RESUME_HTML_CACHE_ALIAS', 'default')]
+
+
+def _key_prefix(resume, template):
+    from .pdf_utils import PDF_RENDERER_VERSION
+    
+    return (
+        f"resume-html:{resume.pk}:{resume.content_version}:"
+        f"{getattr(template, 'pk', None)}:{getattr(template, 'name', '')}:{PDF_RENDERER_VERSION}"
+    )
+
+
+def get_body_cache_key(resume, template):
+    """Build the cache key of a resume body for one template"""
+    return f"{_key_prefix(resume, template)}:body"
+
+
+def get_preview_cache_key(resume, template, font, color):
+    """Build the cache key of a preview fragment for one template, font and color"""
+    from .style_bundles import normalize_style
+    
+    font, color = normalize_style(font, color)
+    return f"{_key_prefix(resume, template)}:preview:{font}:{color}"
+
+
+def _timeout():
+    return getattr(settings, 'RESUME_HTML_CACHE_TIMEOUT', 60 * 60)
+
+
+def render_resume_body(resume, template=None, use_cache=True):
+    """
+    Render the template partial of a resume, reusing a cached copy when possible
+    
+    Args:
+        resume: Resume model instance
+        template: ResumeTemplate model instance (or None to use resume.template)
+        use_cache: Look up and store the fragment in the HTML cache; pass
+            False for resumes edited in memory without being saved
+    
+    Returns:
+        SafeString: The rendered body HTML
+    """
+    if template is None:
+        template = resume.template
+    
+    cache_key = get_body_cache_key(resume, template)
+    if use_cache:
+        body = get_html_cache().get(cache_key)
+        if body is not None:
+            return mark_safe(body)
+    
+    body = render_to_string('resume_templates/body.html', {
+        'resume': resume,
+        'template': template,
+    })
+    
+    if use_cache:
+        get_html_cache().set(cache_key, str(body), _timeout())
+    
+    return body
+
+
+def render_resume_preview(resume, template=None, font='helvetica', color='blue', use_cache=True):
+    """
+    Render the preview fragment of a resume with its scoped stylesheet
+    
+    Args:
+        resume: Resume model instance
+        template: ResumeTemplate model instance (or None to use resume.template)
+        font: Font family to use (default: helvetica)
+        color: Accent color to use (default: blue)
+        use_cache: Look up and store the fragment in the HTML cache
+    
+    Returns:
+        SafeString: The rendered resume_content.html fragment
+    """
+    from .style_bundles import get_bundle
+    
+    if template is None:
+        template = resume.template
+    
+    cache_key = get_preview_cache_key(resume, template, font, color)
+    if use_cache:
+        html_content = get_html_cache().get(cache_key)
+        if html_content is not None:
+            logger.debug(f"Preview cache hit for resume {resume.slug}")
+            return mark_safe(html_content)
+    
+    html_content = render_to_string('resume_content.html', {
+        'resume': resume,
+        'template': template,
+        'font': font,
+        'color': color,
+        'style_bundle': get_bundle(getattr(template, 'css_template', None), font, color, media='screen'),
+        'resume_body': render_resume_body(resume, template, use_cache=use_cache),
+    })
+    
+    if use_cache:
+        get_html_cache().set(cache_key, str(html_content), _timeout())
+    
+    return html_content
+
+
+def get_section_cache_key(resume, template, section):
+    """Build the cache key of one section of a resume body"""
+    return f"{_key_prefix(resume, template)}:section:{section}"
+
+
+def render_resume_section(resume, section, template=None, use_cache=True):
+    """
+    Render one section partial of the classic layout
+    
+    Args:
+        resume: Resume model instance
+        section: Key of resume.content the partial renders (e.g. 'summary')
+        template: ResumeTemplate model instance (or None to use resume.template)
+        use_cache: Look up and store the fragment in the HTML cache
+    
+    Returns:
+        SafeString: The rendered section HTML
+    """
+    if template is None:
+        template = resume.template
+    
+    cache_key = get_section_cache_key(resume, template, section)
+    if use_cache:
+        html_content = get_html_cache().get(cache_key)
+        if html_content is not None:
+            return mark_safe(html_content)
+    
+    html_content = render_to_string(f'resume_templates/classic/{section}.html', {'resume': resume})
+    
+    if use_cache:
+        get_html_cache().set(cache_key, str(html_content), _timeout())
+    
+    return html_content
@@ -0,0 +1,144 @@
+"""
+Probabilistic sketches for resume analytics
+
+HyperLogLog estimates the number of distinct items in a stream using a
+fixed number of small registers. With precision p=8 a sketch is 256 bytes
+and the estimate has a standard error of about 6.5%, which is plenty for a
+"unique visitors" figure. Sketches of different days merge by taking the
+register-wise maximum, so any date range can be counted from the daily
+rollups without looking at raw events.
+
+SpaceSaving keeps the approximate top-k items of a stream (referrer
+domains, campaign sources) in a bounded number of counters.
+"""
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality estimator
+    
+    Args:
+        p: Precision; the sketch uses 2**p one-byte registers
+        registers: Serialized registers to start from (e.g. from to_bytes())
+    """
+    
+    def __init__(self, p=8, registers=None):
+        self.p = p
+        self.m = 1 << p
+        if registers is None:
+            self.registers = bytearray(self.m)
+        else:
+            if len(registers) != self.m:
+                raise ValueError(f"Expected {self.m} registers, got {len(registers)}")
+            self.registers = bytearray(registers)
+    
+    @classmethod
+    def from_bytes(cls, data, p=8):
+        """Load a sketch stored with to_bytes(); empty data gives an empty sketch"""
+        return cls(p, bytes(data) if data else None)
+    
+    def to_bytes(self):
+        return bytes(self.registers)
+    
+    def add(self, value):
+        """Add a string to the sketch"""
+        x = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64 - p bits
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.p != self.p:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+    
+    def count(self):
+        """
+        Estimate the number of distinct values added
+        
+        Returns:
+            int: The cardinality estimate
+        """
+        if self.m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / self.m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[self.m]
+        
+        estimate = alpha * self.m * self.m / sum(2.0 ** -register for register in self.registers)
+        
+        # Small cardinalities: linear counting over the empty registers is more accurate
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        
+        return int(round(estimate))
+    
+    def __len__(self):
+        return self.count()
+
+
+class SpaceSaving:
+    """
+    Space-saving heavy-hitters sketch
+    
+    Tracks at most `capacity` items. When a new item arrives and the sketch
+    is full, the item with the lowest count is replaced and the newcomer
+    inherits that count as its possible overestimate. Any item whose true
+    count exceeds total / capacity is guaranteed to be tracked.
+    
+    Args:
+        capacity: Maximum number of tracked items
+        counters: Serialized counters to start from (e.g. from to_dict())
+    """
+    
+    def __init__(self, capacity=20, counters=None):
+        self.capacity = capacity
+        # item -> [count, overestimate]
+        self.counters = {item: list(value) for item, value in (counters or {}).items()}
+    
+    @classmethod
+    def from_dict(cls, data, capacity=20):
+        """Load a sketch stored with to_dict(); empty data gives an empty sketch"""
+        data = data or {}
+        return cls(data.get('capacity', capacity), data.get('counters'))
+    
+    def to_dict(self):
+        return {'capacity': self.capacity, 'counters': self.counters}
+    
+    def add(self, item, weight=1):
+        """Count `weight` occurrences of an item"""
+        if item in self.counters:
+            self.counters[item][0] += weight
+            return
+        
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+            return
+        
+        evicted = min(self.counters, key=lambda key: self.counters[key][0])
+        floor = self.counters.pop(evicted)[0]
+        self.counters[item] = [floor + weight, floor]
+    
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        for item, (count, error) in other.counters.items():
+            self.add(item, count)
+        return self
+    
+    def top(self, n=10):
+        """
+        Return the most frequent items
+        
+        Returns:
+            list: (item, count, overestimate) tuples, most frequent first; the
+                true count lies between count - overestimate and count
+        """
+        ranked = sorted(self.counters.items(), key=lambda entry: (-entry[1][0], entry[0]))
+        return [(item, count, error) for item, (count, error) in ranked[:n]]
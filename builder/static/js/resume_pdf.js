@@ -8,6 +8,9 @@ function generateResumePdf(resumeSlug, options = {}) {
     const defaultOptions = {
         font: 'helvetica',
         color: 'blue',
+        async: false,
+        pollInterval: 1000,
+        maxPollAttempts: 120,
         onSuccess: function(pdfUrl) {
             window.open(pdfUrl, '_blank');
         },
@@ -28,10 +31,20 @@ function generateResumePdf(resumeSlug, options = {}) {
     if (settings.templateId) {
         url += `&template_id=${settings.templateId}`;
     }
+    if (settings.async) {
+        url += '&async=1';
+    }
     
     // Make AJAX request
     fetch(url)
         .then(response => response.json())
+        .then(data => {
+            // Background job queued - poll until it finishes
+            if (data.success && data.job_id) {
+                return pollPdfJob(data.status_url, settings.pollInterval, settings.maxPollAttempts);
+            }
+            return data;
+        })
         .then(data => {
             // Hide loading state
             document.getElementById('pdfSpinner').classList.add('hidden');
@@ -61,3 +74,30 @@ function generateResumePdf(resumeSlug, options = {}) {
             console.error('PDF generation error:', error);
         });
 }
+
+// Poll a background PDF job until it is done, has failed, or maxAttempts is reached
+function pollPdfJob(statusUrl, interval, maxAttempts = 120) {
+    return new Promise((resolve, reject) => {
+        let attempts = 0;
+        function check() {
+            attempts += 1;
+            fetch(statusUrl)
+                .then(response => response.json())
+                .then(data => {
+                    if (data.status === 'done' || data.status === 'failed') {
+                        resolve(data);
+                    } else if (attempts >= maxAttempts) {
+                        // The job is stuck (e.g. no PDF workers are running); stop polling
+                        resolve({
+                            success: false,
+                            error: 'PDF generation is taking too long, please try again later.'
+                        });
+                    } else {
+                        setTimeout(check, interval);
+                    }
+                })
+                .catch(reject);
+        }
+        check();
+    });
+}
\ No newline at end of file
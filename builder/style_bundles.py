@@ -0,0 +1,253 @@
+"""
+Precompiled stylesheet bundles for every template, font and color combination
+
+A bundle is the merged and minified CSS for one combination. Print bundles
+feed the PDF renderer (@page rules, pdf.css, template CSS, font and color);
+screen bundles are scoped to the preview container so they do not restyle
+the rest of the page. Bundles are written by `manage.py build_style_bundles`
+and filled lazily when one is missing. Bundle names end in a digest of their
+sources, so editing pdf.css or a template stylesheet yields a new bundle
+instead of reusing the stale one.
+"""
+from django.conf import settings
+import hashlib
+import os
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = ('print', 'screen')
+
+# Selector the preview container uses in resume_content.html
+SCREEN_SCOPE = '.resume-content'
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+# Static path -> file on disk, and (combination, source file stats) -> bundle name
+_source_files = {}
+_bundle_names = {}
+
+
+def get_bundle_dir():
+    """Return the directory precompiled bundles are stored in"""
+    return str(getattr(settings, 'PDF_STYLE_BUNDLE_DIR', os.path.join(settings.BASE_DIR, 'build', 'style_bundles')))
+
+
+def normalize_style(font, color):
+    """Map unknown fonts and colors to the defaults, as the CSS helpers do"""
+    from .pdf_utils import FONT_FAMILIES, ACCENT_COLORS
+    
+    if font not in FONT_FAMILIES:
+        font = 'helvetica'
+    if color not in ACCENT_COLORS:
+        color = 'blue'
+    
+    return font, color
+
+
+def _get_source_files(css_template, media):
+    """Return the files on disk a bundle is built from"""
+    from .pdf_renderer import BASE_CSS_PATH, TEMPLATE_CSS_DIR, find_static_file
+    
+    paths = [BASE_CSS_PATH] if media == 'print' else []
+    if css_template:
+        paths.append(f'{TEMPLATE_CSS_DIR}{css_template}')
+    
+    files = []
+    for path in paths:
+        if path not in _source_files:
+            filename = find_static_file(path)
+            if not filename:
+                continue
+            _source_files[path] = filename
+        files.append(_source_files[path])
+    
+    return files
+
+
+def _stat_source(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return (filename, None, None)
+    return (filename, stat.st_mtime_ns, stat.st_size)
+
+
+def get_bundle_name(css_template, font, color, media='print'):
+    """
+    Build the file name of a bundle
+    
+    The name ends in a digest of the source CSS. It is recomputed only when
+    the modification time or size of a source file changes, so looking a
+    name up costs a stat() per source file.
+    
+    Args:
+        css_template: ResumeTemplate.css_template value (or None)
+        font: Font family name
+        color: Accent color name
+        media: 'print' for the PDF renderer, 'screen' for the preview
+    
+    Returns:
+        str: File name of the bundle
+    """
+    font, color = normalize_style(font, color)
+    sources = tuple(_stat_source(filename) for filename in _get_source_files(css_template, media))
+    key = (css_template, font, color, media, sources)
+    
+    name = _bundle_names.get(key)
+    if name is None:
+        stem = os.path.splitext(os.path.basename(css_template or ''))[0] or 'default'
+        stem = re.sub(r'[^A-Za-z0-9_-]', '_', stem)
+        digest = hashlib.sha1(_join_sources(css_template, font, color, media).encode('utf-8')).hexdigest()[:12]
+        name = f"{media}-{stem}-{font}-{color}-{digest}.css"
+        with _bundles_lock:
+            _bundle_names[key] = name
+    
+    return name
+
+
+def minify_css(css):
+    """
+    Strip comments and redundant whitespace from a stylesheet
+    
+    Args:
+        css: CSS source
+    
+    Returns:
+        str: Minified CSS
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    # Spaces before ':' are kept since 'a :hover' and 'a:hover' differ
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def _read_static(path):
+    """Read a static file, returning an empty string if it cannot be found"""
+    from .pdf_renderer import find_static_file
+    
+    filename = find_static_file(path)
+    if not filename:
+        return ''
+    
+    with open(filename, encoding='utf-8') as css_file:
+        return css_file.read()
+
+
+def _join_sources(css_template, font, color, media):
+    """Concatenate the unminified stylesheets of a bundle"""
+    from .pdf_renderer import PAGE_CSS, BASE_CSS_PATH, TEMPLATE_CSS_DIR
+    from .pdf_utils import get_font_css, get_color_css
+    
+    parts = []
+    
+    if media == 'print':
+        parts.append(PAGE_CSS)
+        parts.append(_read_static(BASE_CSS_PATH))
+    
+    if css_template:
+        parts.append(_read_static(f'{TEMPLATE_CSS_DIR}{css_template}'))
+    
+    scope = SCREEN_SCOPE if media == 'screen' else None
+    parts.append(get_font_css(font, scope=scope))
+    parts.append(get_color_css(color, scope=scope))
+    
+    return '\n'.join(parts)
+
+
+def build_bundle(css_template, font, color, media='print'):
+    """
+    Merge and minify the stylesheets for one combination
+    
+    Args:
+        css_template: ResumeTemplate.css_template value (or None)
+        font: Font family name
+        color: Accent color name
+        media: 'print' for the PDF renderer, 'screen' for the preview
+    
+    Returns:
+        str: Minified CSS
+    """
+    font, color = normalize_style(font, color)
+    return minify_css(_join_sources(css_template, font, color, media))
+
+
+def write_bundle(css_template, font, color, media='print'):
+    """
+    Build a bundle and store it in the bundle directory
+    
+    Returns:
+        str: Minified CSS
+    """
+    css = build_bundle(css_template, font, color, media)
+    bundle_dir = get_bundle_dir()
+    os.makedirs(bundle_dir, exist_ok=True)
+    
+    name = get_bundle_name(css_template, font, color, media)
+    path = os.path.join(bundle_dir, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as bundle_file:
+        bundle_file.write(css)
+    os.replace(tmp_path, path)
+    
+    # Remove bundles of the same combination built from older sources
+    stale = re.compile(re.escape(name[:-len('.css')].rsplit('-', 1)[0]) + r'-[0-9a-f]{12}\.css$')
+    for other in os.listdir(bundle_dir):
+        if other != name and stale.match(other):
+            try:
+                os.remove(os.path.join(bundle_dir, other))
+            except OSError:
+                pass
+    
+    return css
+
+
+def get_bundle(css_template, font, color, media='print'):
+    """
+    Load a precompiled bundle, building it if it has not been compiled yet
+    
+    Args:
+        css_template: ResumeTemplate.css_template value (or None)
+        font: Font family name
+        color: Accent color name
+        media: 'print' for the PDF renderer, 'screen' for the preview
+    
+    Returns:
+        str: Minified CSS
+    """
+    name = get_bundle_name(css_template, font, color, media)
+    
+    css = _bundles.get(name)
+    if css is not None:
+        return css
+    
+    path = os.path.join(get_bundle_dir(), name)
+    try:
+        with open(path, encoding='utf-8') as bundle_file:
+            css = bundle_file.read()
+    except FileNotFoundError:
+        try:
+            css = write_bundle(css_template, font, color, media)
+        except OSError as e:
+            # Fall back to an in-memory bundle if the directory is read-only
+            logger.warning(f"Could not store style bundle {name}: {str(e)}")
+            css = build_bundle(css_template, font, color, media)
+    
+    with _bundles_lock:
+        _bundles[name] = css
+    
+    return css
+
+
+def clear_bundle_memo():
+    """Forget bundles and bundle names loaded into this process"""
+    with _bundles_lock:
+        _bundles.clear()
+        _bundle_names.clear()
+        _source_files.clear()
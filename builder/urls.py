@@ -19,14 +19,23 @@ urlpatterns = [
     
     # Resume preview and PDF
     path('resume/<slug:slug>/preview/', views_resume.preview_resume, name='preview_resume'),
+    path('resume/<slug:slug>/preview/stream/', views_resume.preview_resume_stream, name='preview_resume_stream'),
+    path('resume/<slug:slug>/preview/version/', views_resume.preview_resume_version, name='preview_resume_version'),
+    path('resume/<slug:slug>/sections/<str:section>/', views_resume.update_resume_section, name='update_resume_section'),
     path('resume/<slug:slug>/generate-pdf/', views_resume.generate_resume_pdf, name='generate_resume_pdf'),
+    path('pdf-jobs/<uuid:job_id>/', views_resume.pdf_job_status, name='pdf_job_status'),
+    path('pdfs/<path:name>', views_resume.download_pdf, name='download_pdf'),
+    path('pdf-backends/health/', views_resume.pdf_backend_health, name='pdf_backend_health'),
+    path('pdf-metrics/', views_resume.pdf_metrics, name='pdf_metrics'),
     path('resume/<slug:slug>/duplicate/', views_resume.duplicate_resume, name='duplicate_resume'),
     path('resume/<slug:slug>/export-pdf/', export_pdf_resume, name='export_pdf_resume'),
     path('export-pdf/', views.export_pdf, name='export_pdf'),
+    path('resumes/export/', views_resume.bulk_export_resumes, name='bulk_export_resumes'),
     
     # Sharing and analytics
     path('resume/<slug:slug>/share/', views_resume.share_resume, name='share_resume'),
     path('resume/<slug:slug>/analytics/', views_resume.resume_analytics, name='resume_analytics'),
+    path('resume/<slug:slug>/analytics/export/', views_resume.export_resume_analytics, name='export_resume_analytics'),
     path('r/<str:share_token>/', views_resume.public_resume_view, name='public_resume'),
     
     # API endpoints
@@ -10,8 +10,9 @@ import json
 
 from .models import (
     UserProfile, Education, Experience, Skill, Project, 
-    Certification, ResumeTemplate, Resume, ResumeAnalytics
+    Certification, ResumeTemplate, Resume
 )
+from .analytics import record_event
 
 # Home page
 def home(request):
@@ -31,11 +32,14 @@ def dashboard(request):
         }
     )
     
-    resumes = Resume.objects.filter(user_profile=profile)
+    # The view and download counters come with the resume rows themselves
+    resumes = list(Resume.objects.filter(user_profile=profile))
     
     context = {
         'profile': profile,
         'resumes': resumes,
+        'total_views': sum(resume.view_count for resume in resumes),
+        'total_downloads': sum(resume.download_count for resume in resumes),
     }
     
     return render(request, 'builder/dashboard.html', context)
@@ -64,7 +68,7 @@ def create_resume(request):
         )
         
         # Create analytics record
-        ResumeAnalytics.objects.create(resume=resume)
+        record_event(resume, 'viewed')
         
         messages.success(request, 'Resume created successfully')
         return redirect('edit_resume', slug=resume.slug)
@@ -444,8 +448,7 @@ def view_resume(request, slug):
     
     # Log view for analytics if not the owner
     if not is_owner:
-        analytics, created = ResumeAnalytics.objects.get_or_create(resume=resume)
-        analytics.log_view()
+        record_event(resume, 'viewed')
     
     profile = resume.user_profile
     educations = Education.objects.filter(user_profile=profile)
@@ -491,11 +494,7 @@ def export_pdf(request, slug=None):
             raise Http404("Resume not found")
         
         # Log download for analytics
-        if hasattr(resume, 'analytics'):
-            resume.analytics.log_download()
-        else:
-            analytics = ResumeAnalytics.objects.create(resume=resume)
-            analytics.log_download()
+        record_event(resume, 'pdf_generated')
         
         # Generate PDF (we'll implement this later with WeasyPrint)
         response = HttpResponse(content_type='application/pdf')
@@ -577,7 +576,7 @@ def customize_template(request, template_id):
         )
         
         # Create analytics record
-        ResumeAnalytics.objects.create(resume=resume)
+        record_event(resume, 'viewed')
         
         messages.success(request, f'Resume created with {template.name} template successfully')
         return redirect('edit_resume', slug=resume.slug)
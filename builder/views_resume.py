@@ -1,60 +1,222 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_POST
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
+from django.views.decorators.http import require_POST, condition
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
 from django.contrib.auth.decorators import login_required
-from django.template.loader import render_to_string
+from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
+from django.db.models import F, Q, Sum
+from django.urls import reverse
 from django.conf import settings
 
-from .models import Resume, ResumeTemplate, ResumeAnalytics
+from .models import Resume, ResumeTemplate, ResumeAnalytics, PDFRenderJob
+from .http_caching import get_resume_etag, memoize_on_request, mark_revalidate, ranged_file_response
+from .analytics import record_event
+from .sketches import HyperLogLog, SpaceSaving
+from .ratelimit import rate_limit
+from .analytics_export import FORMATS as EXPORT_FORMATS, filter_events, stream_events
+from .style_bundles import normalize_style
 
 import json
 import os
 import uuid
 from datetime import datetime
 
+# Times a section edit is re-applied after a concurrent save before giving up
+SECTION_UPDATE_ATTEMPTS = 3
+
 # Import PDF utilities with lazy imports to avoid circular dependencies
 def get_pdf_utils():
     from .pdf_utils import generate_pdf, handle_pdf_error
     return generate_pdf, handle_pdf_error
 
+def _get_preview_target(request, slug):
+    """Return the resume and template an AJAX preview renders, loaded once per request"""
+    def load():
+        resume = Resume.objects.select_related('template').filter(slug=slug, user=request.user).first()
+        if resume is None:
+            return None, None
+        
+        template_id = request.GET.get('template_id')
+        if not template_id:
+            return resume, resume.template
+        
+        try:
+            return resume, ResumeTemplate.objects.filter(id=template_id).first()
+        except ValueError:
+            return resume, None
+    
+    return memoize_on_request(request, ('preview', slug), load)
+
+
+def preview_etag(request, slug):
+    """ETag of the AJAX preview fragment; the full page is not cached"""
+    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return None
+    
+    resume, template = _get_preview_target(request, slug)
+    if resume is None or template is None and request.GET.get('template_id'):
+        return None
+    
+    font, color = normalize_style(request.GET.get('font', 'helvetica'), request.GET.get('color', 'blue'))
+    return get_resume_etag(resume, template, font, color, kind='preview')
+
+
+def preview_last_modified(request, slug):
+    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return None
+    
+    resume, template = _get_preview_target(request, slug)
+    return resume.updated_at if resume else None
+
+
 @login_required
+@condition(etag_func=preview_etag, last_modified_func=preview_last_modified)
 def preview_resume(request, slug):
     """
     Display a preview of the resume with template selection options
-    """
-    resume = get_object_or_404(Resume, slug=slug, user=request.user)
-    available_templates = ResumeTemplate.objects.all()
     
+    The AJAX preview fragment carries an ETag and Last-Modified, so an
+    unchanged preview is answered with 304 without rendering anything.
+    """
     # Check if it's an AJAX request for the preview content only
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        template_id = request.GET.get('template_id')
+        resume, template = _get_preview_target(request, slug)
+        if resume is None or template is None and request.GET.get('template_id'):
+            raise Http404("Resume not found")
+        
         font = request.GET.get('font', 'helvetica')
         color = request.GET.get('color', 'blue')
         
-        if template_id:
-            template = get_object_or_404(ResumeTemplate, id=template_id)
-        else:
-            template = resume.template
+        # Render just the resume content, served from the HTML cache until the resume is saved again
+        from .render_cache import render_resume_preview
+        html_content = render_resume_preview(resume, template, font, color)
         
-        # Render just the resume content
-        html_content = render_to_string('resume_content.html', {
-            'resume': resume,
-            'template': template,
-            'font': font,
-            'color': color,
-        })
-        
-        return HttpResponse(html_content)
+        response = HttpResponse(html_content)
+        patch_vary_headers(response, ['X-Requested-With'])
+        return mark_revalidate(response)
+    
+    from .live_preview import is_asgi_request
+    
+    resume = get_object_or_404(Resume, slug=slug, user=request.user)
+    available_templates = ResumeTemplate.objects.all()
     
     # Render the full preview page
     return render(request, 'preview_resume.html', {
         'resume': resume,
         'available_templates': available_templates,
+        'live_preview_stream': is_asgi_request(request),
+        'preview_poll_interval': int(getattr(settings, 'PREVIEW_POLL_INTERVAL', 2) * 1000),
     })
 
 
+@login_required
+async def preview_resume_stream(request, slug):
+    """
+    Stream preview fragments as server-sent events whenever the resume changes
+    
+    Query parameters:
+        template_id: Template selected in the preview (optional)
+        version: content_version of the preview the browser already shows (optional)
+    """
+    from django.shortcuts import aget_object_or_404
+    from .live_preview import is_asgi_request, preview_events
+    
+    # Under WSGI the stream would hold a worker thread for its whole lifetime;
+    # 204 tells EventSource not to reconnect
+    if not is_asgi_request(request):
+        return HttpResponse(status=204)
+    
+    user = await request.auser()
+    resume = await aget_object_or_404(Resume, slug=slug, user=user)
+    
+    # On reconnect the browser reports the last version event it received
+    try:
+        client_version = int(request.headers.get('Last-Event-ID') or request.GET['version'])
+    except (KeyError, ValueError):
+        client_version = None
+    
+    # Checked here: an error inside the running generator would just cut the stream
+    try:
+        template_id = int(request.GET['template_id']) if request.GET.get('template_id') else None
+    except ValueError:
+        return JsonResponse({'error': 'template_id must be an integer'}, status=400)
+    
+    response = StreamingHttpResponse(
+        preview_events(resume.pk, template_id, client_version),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def preview_resume_version(request, slug):
+    """
+    Return the content version of a resume, polled by the preview under WSGI
+    """
+    version = Resume.objects.filter(slug=slug, user=request.user).values_list('content_version', flat=True).first()
+    if version is None:
+        raise Http404("Resume not found")
+    
+    response = JsonResponse({'version': version})
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@login_required
+@require_POST
+def update_resume_section(request, slug, section):
+    """
+    Replace one section of the resume content, e.g. from the live editor
+    
+    The request body is JSON of the form {"value": ...}. Saving bumps the
+    content version, which the preview stream picks up and pushes as a
+    single re-rendered section.
+    
+    The content is only written if its version is still the one it was read
+    at, so two overlapping section edits cannot drop each other; on a
+    conflict the latest content is re-read and the section applied again.
+    If the resume keeps changing underneath, the edit is answered with 409.
+    """
+    from .live_preview import SECTIONS
+    
+    resume = get_object_or_404(Resume, slug=slug, user=request.user)
+    
+    if section not in SECTIONS:
+        return JsonResponse({'error': f'Unknown section: {section}'}, status=400)
+    
+    try:
+        value = json.loads(request.body)['value']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected a JSON body with a "value" key'}, status=400)
+    
+    if not isinstance(value, SECTIONS[section]):
+        return JsonResponse({'error': f'{section} must be a {SECTIONS[section].__name__}'}, status=400)
+    
+    for _ in range(SECTION_UPDATE_ATTEMPTS):
+        content = dict(resume.content or {})
+        content[section] = value
+        updated = Resume.objects.filter(pk=resume.pk, content_version=resume.content_version).update(
+            content=content,
+            content_version=F('content_version') + 1,
+            updated_at=timezone.now(),
+        )
+        if updated:
+            return JsonResponse({
+                'section': section,
+                'content_version': resume.content_version + 1
+            })
+        
+        # Saved by someone else since it was read: apply the section to the latest content
+        resume.refresh_from_db(fields=['content', 'content_version'])
+    
+    return JsonResponse({'error': 'The resume is being changed elsewhere, please retry'}, status=409)
+
+
 @login_required
 def generate_resume_pdf(request, slug):
     """
@@ -86,6 +248,19 @@ def generate_resume_pdf(request, slug):
             'fallback_url': f"/resume/{resume.slug}/export-pdf/"
         })
     
+    # Hand the render to the background workers when asynchronous mode is requested
+    if request.GET.get('async') == '1' or getattr(settings, 'PDF_ASYNC_RENDERING', False):
+        from .pdf_jobs import enqueue_pdf_job
+        
+        job = enqueue_pdf_job(resume, template=template, font=font, color=color)
+        
+        return JsonResponse({
+            'success': True,
+            'job_id': str(job.id),
+            'status': job.status,
+            'status_url': reverse('pdf_job_status', args=[job.id])
+        }, status=202)
+    
     try:
         # WeasyPrint is available, proceed with PDF generation
         generate_pdf, handle_pdf_error = get_pdf_utils()
@@ -96,15 +271,14 @@ def generate_resume_pdf(request, slug):
             color=color
         )
         
-        # Create relative URL for the PDF
-        media_url = settings.MEDIA_URL
-        pdf_url = f"{media_url}pdfs/{filename}"
+        # Link to the tracked download view so the store sees the file being used
+        pdf_url = reverse('download_pdf', args=[filename])
         
         # Record analytics
-        ResumeAnalytics.objects.create(
-            resume=resume,
-            action='pdf_generated',
-            metadata={
+        record_event(
+            resume,
+            'pdf_generated',
+            {
                 'template': template.name,
                 'font': font,
                 'color': color,
@@ -130,6 +304,132 @@ def generate_resume_pdf(request, slug):
         }, status=500)
 
 
+@login_required
+def pdf_job_status(request, job_id):
+    """
+    Report the status of a background PDF job so the client can poll for it
+    """
+    job = get_object_or_404(PDFRenderJob, id=job_id, resume__user=request.user)
+    
+    data = {
+        'success': job.status != 'failed',
+        'job_id': str(job.id),
+        'status': job.status,
+    }
+    
+    if job.status == 'done':
+        data['pdf_url'] = reverse('download_pdf', args=[job.filename])
+        data['filename'] = job.filename
+    elif job.status == 'failed':
+        data['error'] = job.error
+        data['html_fallback'] = True
+        data['fallback_url'] = f"/resume/{job.resume.slug}/export-pdf/"
+    
+    return JsonResponse(data)
+
+
+@login_required
+def download_pdf(request, name):
+    """
+    Serve a generated PDF from the artifact store, refreshing its last access
+    so eviction keeps the files people actually download
+    """
+    from .pdf_storage import get_pdf_store
+    
+    stored = get_pdf_store().open(name)
+    if stored is None:
+        raise Http404("PDF not found")
+    
+    pdf_file, size = stored
+    filename = os.path.basename(name)
+    
+    # Stored files are named after the sha256 of their bytes
+    etag = filename[:40]
+    
+    # Browsers revalidate every time, so each reuse reaches the store
+    not_modified = get_conditional_response(request, etag=quote_etag(etag))
+    if not_modified is not None:
+        pdf_file.close()
+        return mark_revalidate(not_modified)
+    
+    response = ranged_file_response(request, pdf_file, size, filename, etag=etag)
+    if response.status_code in (200, 206):
+        response['ETag'] = quote_etag(etag)
+    return mark_revalidate(response)
+
+
+@staff_member_required
+def pdf_backend_health(request):
+    """
+    Report the probe result and circuit breaker state of every PDF backend
+    """
+    from .pdf_backends import get_backend_registry
+    
+    registry = get_backend_registry()
+    
+    return JsonResponse({
+        'available': registry.is_available(),
+        'backends': registry.health()
+    })
+
+
+@staff_member_required
+def pdf_metrics(request):
+    """
+    Report render latency percentiles and throughput for the PDF pipeline
+    
+    Query parameters:
+        hours: Size of the window to summarize (default: 24)
+        by: Optional label to break the summary down by (template, font, color or source)
+    """
+    from .pdf_metrics import summarize_by_label
+    
+    try:
+        hours = max(1, int(request.GET.get('hours', 24)))
+    except ValueError:
+        return JsonResponse({'error': 'hours must be a whole number'}, status=400)
+    
+    label = request.GET.get('by') or None
+    if label not in (None, 'template', 'font', 'color', 'source'):
+        return JsonResponse({'error': 'by must be one of template, font, color or source'}, status=400)
+    
+    return JsonResponse({
+        'hours': hours,
+        'by': label,
+        'metrics': summarize_by_label(hours, label)
+    })
+
+
+@login_required
+def bulk_export_resumes(request):
+    """
+    Export several of the user's resumes as one ZIP of PDFs, streamed as each render finishes
+    """
+    from .weasyprint_utils import is_weasyprint_available, get_weasyprint_error_response
+    from .bulk_export import stream_resumes_zip
+    
+    if not is_weasyprint_available():
+        return get_weasyprint_error_response()
+    
+    params = request.POST if request.method == 'POST' else request.GET
+    slugs = [slug for value in params.getlist('slugs') for slug in value.split(',') if slug]
+    font = params.get('font', 'helvetica')
+    color = params.get('color', 'blue')
+    
+    resumes = Resume.objects.filter(Q(user=request.user) | Q(user_profile__user=request.user))
+    if slugs:
+        resumes = resumes.filter(slug__in=slugs)
+    
+    if not resumes.exists():
+        return JsonResponse({'error': 'No resumes to export'}, status=404)
+    
+    filename = f"resumes-{timezone.now().strftime('%Y%m%d-%H%M%S')}.zip"
+    response = StreamingHttpResponse(stream_resumes_zip(resumes, font, color), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    
+    return response
+
+
 @login_required
 @require_POST
 def duplicate_resume(request, slug):
@@ -148,10 +448,10 @@ def duplicate_resume(request, slug):
     )
     
     # Record analytics
-    ResumeAnalytics.objects.create(
-        resume=new_resume,
-        action='duplicated',
-        metadata={
+    record_event(
+        new_resume,
+        'duplicated',
+        {
             'original_id': str(original_resume.id)
         }
     )
@@ -181,10 +481,10 @@ def share_resume(request, slug):
         resume.save()
         
         # Record analytics
-        ResumeAnalytics.objects.create(
-            resume=resume,
-            action='share_status_changed',
-            metadata={
+        record_event(
+            resume,
+            'share_status_changed',
+            {
                 'is_public': resume.is_public
             }
         )
@@ -196,26 +496,53 @@ def share_resume(request, slug):
     })
 
 
+def _get_public_resume(request, share_token):
+    return memoize_on_request(
+        request,
+        ('public', share_token),
+        lambda: Resume.objects.select_related('template').filter(share_token=share_token, is_public=True).first()
+    )
+
+
+def public_resume_etag(request, share_token):
+    resume = _get_public_resume(request, share_token)
+    return get_resume_etag(resume, resume.template, kind='public') if resume else None
+
+
+def public_resume_last_modified(request, share_token):
+    resume = _get_public_resume(request, share_token)
+    return resume.updated_at if resume else None
+
+
+@rate_limit('public_resume')
+@condition(etag_func=public_resume_etag, last_modified_func=public_resume_last_modified)
 def public_resume_view(request, share_token):
     """
     Public view for shared resumes
+    
+    Browsers and proxies revalidate with the ETag; an unchanged resume is
+    answered with 304 before the view records or renders anything.
     """
-    resume = get_object_or_404(Resume, share_token=share_token, is_public=True)
+    resume = _get_public_resume(request, share_token)
+    if resume is None:
+        raise Http404("Resume not found")
     
     # Record view
-    ResumeAnalytics.objects.create(
-        resume=resume,
-        action='viewed',
-        metadata={
+    record_event(
+        resume,
+        'viewed',
+        {
             'ip': get_client_ip(request),
             'user_agent': request.META.get('HTTP_USER_AGENT', ''),
-            'referrer': request.META.get('HTTP_REFERER', '')
+            'referrer': request.META.get('HTTP_REFERER', ''),
+            'utm_source': request.GET.get('utm_source', '')
         }
     )
     
-    return render(request, 'public_resume.html', {
+    response = render(request, 'public_resume.html', {
         'resume': resume
     })
+    return mark_revalidate(response, private=False)
 
 
 @login_required
@@ -225,45 +552,95 @@ def resume_analytics(request, slug):
     """
     resume = get_object_or_404(Resume, slug=slug, user=request.user)
     
-    # Get analytics data
+    # Recent raw events for the activity list
     analytics = ResumeAnalytics.objects.filter(resume=resume).order_by('-created_at')
     
-    # Calculate summary metrics
-    view_count = analytics.filter(action='viewed').count()
-    download_count = analytics.filter(action='pdf_generated').count()
-    
-    # Get view trend data (last 30 days)
-    thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-    recent_views = analytics.filter(
-        action='viewed', 
-        created_at__gte=thirty_days_ago
+    # Summary metrics and trends come from the daily rollups, not the raw events
+    totals = dict(
+        resume.daily_analytics.order_by().values('action').annotate(total=Sum('count')).values_list('action', 'total')
     )
+    view_count = totals.get('viewed', 0)
+    download_count = totals.get('pdf_generated', 0)
+    bot_view_count = totals.get('bot_viewed', 0)
+    other_count = sum(totals.values()) - view_count - download_count - bot_view_count
     
-    # Create trend data by day
-    trend_data = {}
-    for view in recent_views:
-        date_str = view.created_at.strftime('%Y-%m-%d')
-        if date_str in trend_data:
-            trend_data[date_str] += 1
-        else:
-            trend_data[date_str] = 1
+    # Get view trend data for the selected range (last 30 days by default)
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 365)
+    except ValueError:
+        days = 30
+    start = timezone.localdate() - timezone.timedelta(days=days - 1)
+    recent_views = resume.daily_analytics.filter(
+        action='viewed',
+        date__gte=start
+    ).order_by('date').values_list('date', 'count', 'visitors')
+    
+    # Unique visitors: merge the daily sketches instead of scanning events
+    visitors = HyperLogLog()
+    trend_unique = []
+    for date, count, sketch in recent_views:
+        day_visitors = HyperLogLog.from_bytes(sketch)
+        visitors.merge(day_visitors)
+        trend_unique.append(day_visitors.count())
     
     # Format for chart JS
-    trend_labels = list(trend_data.keys())
-    trend_values = list(trend_data.values())
+    trend_labels = [date.strftime('%Y-%m-%d') for date, count, sketch in recent_views]
+    trend_values = [count for date, count, sketch in recent_views]
+    
+    # Top referrers and campaign sources, kept as heavy-hitters sketches at ingestion
+    sources = {record.kind: SpaceSaving.from_dict(record.sketch) for record in resume.traffic_sources.all()}
+    top_referrers = sources['referrer_domain'].top(10) if 'referrer_domain' in sources else []
+    top_sources = sources['utm_source'].top(10) if 'utm_source' in sources else []
     
     return render(request, 'resume_analytics.html', {
         'resume': resume,
-        'analytics': analytics[:50],  # Limit to 50 most recent
+        'analytics': analytics.select_related('referrer')[:50],  # Limit to 50 most recent
         'view_count': view_count,
         'download_count': download_count,
+        'other_count': other_count,
+        'bot_view_count': bot_view_count,
+        'days': days,
+        'unique_visitors': visitors.count(),
         'trend_labels': json.dumps(trend_labels),
-        'trend_values': json.dumps(trend_values)
+        'trend_values': json.dumps(trend_values),
+        'trend_unique': json.dumps(trend_unique),
+        'top_referrers': top_referrers,
+        'top_sources': top_sources
     })
 
 
+@login_required
+def export_resume_analytics(request, slug):
+    """
+    Stream the full analytics history of a resume as CSV or NDJSON
+    
+    Query parameters: format ('csv' or 'ndjson'), start and end
+    (YYYY-MM-DD, inclusive) and action (repeatable).
+    """
+    resume = get_object_or_404(Resume, slug=slug, user=request.user)
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Unsupported format '{export_format}'"}, status=400)
+    
+    try:
+        events = filter_events(
+            ResumeAnalytics.objects.filter(resume=resume),
+            start=request.GET.get('start'),
+            end=request.GET.get('end'),
+            actions=request.GET.getlist('action'),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    response = StreamingHttpResponse(stream_events(events, export_format), content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{resume.slug}-analytics.{export_format}"'
+    return response
+
+
 @csrf_exempt
 @require_POST
+@rate_limit('view_beacon')
 def resume_view_api(request):
     """
     API endpoint to record resume views from public pages
@@ -282,13 +659,14 @@ def resume_view_api(request):
             return JsonResponse({'error': 'Resume not found'}, status=404)
         
         # Record analytics
-        ResumeAnalytics.objects.create(
-            resume=resume,
-            action='viewed',
-            metadata={
+        record_event(
+            resume,
+            'viewed',
+            {
                 'ip': get_client_ip(request),
                 'user_agent': request.META.get('HTTP_USER_AGENT', ''),
-                'referrer': referrer
+                'referrer': referrer,
+                'utm_source': data.get('utm_source') or ''
             }
         )
         
@@ -2,39 +2,25 @@
 Utility functions for Django views to check if WeasyPrint dependencies are installed
 """
 import os
-import sys
 import logging
 from django.http import HttpResponse
 
 logger = logging.getLogger(__name__)
 
 def is_weasyprint_available():
-    """Check if WeasyPrint is properly installed with all dependencies"""
+    """
+    Check if a PDF backend can currently render
+    
+    Backends are probed once per process and guarded by a circuit breaker, so
+    this no longer imports WeasyPrint on every request and returns False while
+    a failing backend is being re-probed in the background.
+    """
     try:
-        # Try to import WeasyPrint (this may fail on startup with missing GTK)
-        # We'll wrap this import in a try/except block
-        try:
-            from weasyprint import HTML
-            
-            # On Windows, test if GTK dependencies are available
-            if sys.platform.startswith('win'):
-                try:
-                    # Try to create a simple HTML object (will fail if GTK dependencies missing)
-                    HTML(string="<html></html>")
-                    return True
-                except Exception as e:
-                    logger.error(f"WeasyPrint GTK dependency error: {str(e)}")
-                    return False
-            
-            # On other platforms, assume it's working if the import succeeded
-            return True
-            
-        except ImportError as e:
-            logger.error(f"WeasyPrint import error: {str(e)}")
-            return False
+        from .pdf_backends import get_backend_registry
+        return get_backend_registry().is_available()
         
     except Exception as e:
-        logger.error(f"Unexpected error checking WeasyPrint: {str(e)}")
+        logger.error(f"Unexpected error checking PDF backends: {str(e)}")
         return False
 
 def get_weasyprint_error_response():
@@ -3,6 +3,10 @@ ASGI config for resume project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this module (e.g. with uvicorn or daphne) so the
+live preview stream, which is an async generator, does not hold a worker
+thread for every open editor.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -158,3 +158,140 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# PDF generation
+
+# Cache alias used to store rendered PDF documents, keyed on a digest of the
+# resume content, template and styling
+PDF_CACHE_ALIAS = 'default'
+
+# How long (in seconds) a rendered PDF stays in the cache
+PDF_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Render PDFs in background worker processes instead of the request thread.
+# Clients can also opt in per request with ?async=1
+PDF_ASYNC_RENDERING = False
+
+# Number of local worker processes rendering background PDF jobs. Set to 0 to
+# leave jobs in the queue for `manage.py run_pdf_jobs`
+PDF_WORKER_PROCESSES = 2
+
+# Directory holding the precompiled stylesheet bundles written by
+# `manage.py build_style_bundles` (missing bundles are built on demand)
+PDF_STYLE_BUNDLE_DIR = BASE_DIR / 'build' / 'style_bundles'
+
+# Generated PDFs are deduplicated by content and sharded under
+# MEDIA_ROOT/pdfs. Least recently used files are evicted once the store
+# grows past this many bytes (0 disables eviction)
+PDF_STORE_QUOTA_BYTES = 512 * 1024 * 1024
+
+# PDF rendering backends, tried in order. Each is probed once at startup
+PDF_BACKENDS = [
+    'builder.pdf_backends.WeasyPrintBackend',
+]
+
+# Probe the PDF backends in a background thread when a web process serves its
+# first request; with the sandbox enabled the probe itself runs in a sandbox
+# worker (management commands and PDF workers never probe at startup)
+PDF_PROBE_ON_STARTUP = True
+
+# Consecutive failures (or renders slower than PDF_RENDER_TIMEOUT seconds)
+# after which a backend's circuit breaker opens and requests go straight to
+# the HTML fallback. The backend is re-probed every PDF_BREAKER_RESET_TIMEOUT
+# seconds until it recovers
+PDF_BREAKER_FAILURE_THRESHOLD = 3
+PDF_BREAKER_RESET_TIMEOUT = 60
+PDF_RENDER_TIMEOUT = 30
+
+# Record per-phase timings (HTML, CSS, layout, write) of every PDF render.
+# Summaries are served at /pdf-metrics/ and by `manage.py pdf_metrics`
+PDF_METRICS_ENABLED = True
+
+# PDFs are rendered in separate worker processes so a pathological resume
+# cannot take down or bloat the web process. Each render gets CPU-time and
+# wall-clock budgets (seconds), each worker an address-space cap (bytes),
+# and workers are replaced after PDF_SANDBOX_MAX_JOBS renders. 0 disables a limit
+PDF_SANDBOX_ENABLED = True
+PDF_SANDBOX_PROCESSES = 2
+PDF_SANDBOX_CPU_SECONDS = 20
+PDF_SANDBOX_WALL_SECONDS = 45
+PDF_SANDBOX_MEMORY_BYTES = 2 * 1024 * 1024 * 1024
+PDF_SANDBOX_MAX_JOBS = 50
+
+# Seconds a render may wait for a free sandbox worker before it is refused
+# as busy. The wall-clock budget only starts once a worker has the render
+PDF_SANDBOX_QUEUE_TIMEOUT = 30
+
+# Cache holding rendered resume HTML (the template body shared by preview and
+# PDF export, and the preview fragments). Keys include Resume.content_version,
+# so entries are replaced as soon as a resume is saved
+RESUME_HTML_CACHE_ALIAS = 'default'
+RESUME_HTML_CACHE_TIMEOUT = 60 * 60
+
+# Live preview stream (server-sent events). The stream polls the resume's
+# content_version every PREVIEW_STREAM_POLL_INTERVAL seconds, waits for edits
+# to pause for PREVIEW_STREAM_DEBOUNCE seconds (at most PREVIEW_STREAM_MAX_DELAY)
+# before re-rendering, and closes after PREVIEW_STREAM_LIFETIME seconds so the
+# browser reconnects
+PREVIEW_STREAM_POLL_INTERVAL = 0.5
+PREVIEW_STREAM_DEBOUNCE = 0.3
+PREVIEW_STREAM_MAX_DELAY = 2.0
+PREVIEW_STREAM_KEEPALIVE = 15
+PREVIEW_STREAM_LIFETIME = 300
+
+# Under WSGI the preview page does not open the stream; it polls the resume's
+# content version every PREVIEW_POLL_INTERVAL seconds and reloads on a change
+PREVIEW_POLL_INTERVAL = 2
+
+# Analytics events (views, downloads) are buffered in each process and written
+# with one bulk insert once ANALYTICS_BUFFER_SIZE events are pending or every
+# ANALYTICS_FLUSH_INTERVAL seconds. Buffered events are journaled to
+# ANALYTICS_JOURNAL_DIR and synced at least every ANALYTICS_FSYNC_INTERVAL
+# seconds; journals of crashed processes are replayed automatically or with
+# `manage.py flush_analytics`. Set ANALYTICS_BUFFERED = False to write directly
+ANALYTICS_BUFFERED = True
+ANALYTICS_BUFFER_SIZE = 100
+ANALYTICS_FLUSH_INTERVAL = 5
+ANALYTICS_FSYNC_INTERVAL = 1
+ANALYTICS_JOURNAL_DIR = BASE_DIR / 'var' / 'analytics'
+
+# A buffered batch that fails this many flushes in a row is stored event by
+# event; events that still fail are written to dead-letter-*.jsonl files in
+# ANALYTICS_JOURNAL_DIR instead of blocking every later flush
+ANALYTICS_FLUSH_MAX_RETRIES = 5
+
+# Raw analytics events older than ANALYTICS_RETENTION_DAYS are moved to
+# gzip-compressed monthly files in ANALYTICS_ARCHIVE_DIR by
+# `manage.py archive_analytics`; the daily rollups keep their counts
+ANALYTICS_RETENTION_DAYS = 365
+ANALYTICS_ARCHIVE_DIR = BASE_DIR / 'var' / 'analytics-archive'
+
+# Views from bots, crawlers, link unfurlers and uptime checkers (matched by
+# user agent in builder/bot_detection.py, plus ANALYTICS_BOT_SIGNATURES) are
+# either dropped ('drop'), stored as 'bot_viewed' events that the view counts
+# ignore ('separate'), or counted like any other view ('keep')
+ANALYTICS_BOT_POLICY = 'drop'
+ANALYTICS_BOT_SIGNATURES = []
+
+# A visitor (IP and user agent) viewing the same resume again within the same
+# ANALYTICS_VIEW_DEDUPE_WINDOW seconds, e.g. the public page plus its view
+# beacon or a refresh, is recorded once. Markers are kept in this cache; use a
+# cache shared by all processes (e.g. Redis) in production. 0 disables
+ANALYTICS_VIEW_DEDUPE_WINDOW = 30 * 60
+ANALYTICS_DEDUPE_CACHE_ALIAS = 'default'
+
+# Top referrer domains and utm_source values per resume are counted with a
+# space-saving sketch of this many entries; sources seen less often than
+# 1 / ANALYTICS_TOP_SOURCES_CAPACITY of all views may be dropped from the list
+ANALYTICS_TOP_SOURCES_CAPACITY = 50
+
+# Token-bucket limits for the public resume page and its view beacon, per
+# client IP and per share token ('N/s', 'N/m', 'N/h' or 'N/d'; None disables).
+# Over-limit requests get a 429 before any database work. Buckets are kept in
+# RATE_LIMIT_CACHE_ALIAS; use a cache shared by all processes in production
+RATE_LIMITS = {
+    'public_resume': {'ip': '60/m', 'token': '600/m'},
+    'view_beacon': {'ip': '30/m', 'token': '300/m'},
+}
+RATE_LIMIT_CACHE_ALIAS = 'default'